@@ -1,16 +1,75 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from typing import Annotated, Optional
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from typing import Annotated, Iterator, Literal, Optional
 from pydantic import BaseModel, Field
-import tempfile
-import shutil
+import httpx
 from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
+from marker.converters.pool import ConverterPool
+from marker.models import ModelRegistry
+from marker.settings import settings
+from marker.utils.admission import AdmissionRejected, PageBudget, Reservation, count_pages
+from marker.utils.encoding import ArtifactStore, encode_json_zstd, encode_msgpack
+from marker.utils.cache import conversion_cache_key, create_result_cache
+from marker.utils.ingest import SpooledDocument
+from marker.utils.jobs import JobManager, JobQueueFull
+from marker.providers.pools import shutdown_pools
 import json
-import requests
-import os
 
-app = FastAPI(title="PDF Parser API", description="Parse PDFs using Marker", version="1.0")
+app_data = {}
+
+ResponseFormat = Literal["json", "msgpack", "json+zstd"]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load every model once per process; requests borrow them from the registry
+    app_data["models"] = ModelRegistry(
+        batching=settings.INFERENCE_BATCHING,
+        batch_max_wait=settings.INFERENCE_BATCH_MAX_WAIT,
+    ).load()
+    if settings.MODEL_WARMUP:
+        app_data["models"].warmup(compile=settings.MODEL_COMPILE)
+    app_data["loop"] = asyncio.get_running_loop()
+    # One client for all downloads, so connections to the CDN are reused
+    app_data["http"] = httpx.AsyncClient(timeout=30, follow_redirects=True)
+    app_data["converters"] = ConverterPool(PdfConverter)
+    app_data["artifacts"] = ArtifactStore(settings.ARTIFACT_TTL, settings.ARTIFACT_STORE_MAX_BYTES)
+    app_data["admission"] = PageBudget(settings.ADMISSION_MAX_PAGES, max_wait=settings.ADMISSION_MAX_WAIT)
+    app_data["cache"] = create_result_cache(
+        settings.RESULT_CACHE_BACKEND,
+        settings.RESULT_CACHE_MAX_BYTES,
+        settings.RESULT_CACHE_DIR,
+    )
+    app_data["jobs"] = JobManager(
+        max_workers=settings.JOB_WORKERS,
+        max_queued=settings.JOB_QUEUE_SIZE,
+        result_ttl=settings.JOB_RESULT_TTL,
+    )
+
+    yield
+
+    if "http" in app_data:
+        await app_data["http"].aclose()
+        del app_data["http"]
+    if "converters" in app_data:
+        app_data["converters"].clear()
+        del app_data["converters"]
+    if "jobs" in app_data:
+        app_data["jobs"].shutdown()
+        del app_data["jobs"]
+    if "models" in app_data:
+        app_data["models"].unload()
+        del app_data["models"]
+    # pdftext and raster workers outlive single documents, stop them with the server
+    shutdown_pools()
+
+
+app = FastAPI(title="PDF Parser API", description="Parse PDFs using Marker", version="1.0", lifespan=lifespan)
 
 
 class PDFParserConfig(BaseModel):
@@ -42,88 +101,301 @@ class PDFParserConfig(BaseModel):
     ] = {}
 
 
+class ConversionError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def build_converter_config(optional_config: dict) -> dict:
+    ollama_base_url: str = optional_config.get('ollama_base_url', "http://ollama-keda.mobiusdtaas.ai")
+    ollama_model: str = optional_config.get('ollama_model', "llama3.2:latest")
+    use_llm: bool = optional_config.get('use_llm', False)
+    llm_service: str = optional_config.get('llm_service', 'ollama')
+    if llm_service.lower() == 'ollama':
+        llm_service = 'marker.services.ollama.OllamaService'
+    disable_ocr: bool = optional_config.get('disable_ocr', True)
+    output_json: bool = optional_config.get('output_json', True)
+    ignore_TOC: bool = optional_config.get('ignore_TOC', True)
+    ignore_before_TOC: bool = optional_config.get('ignore_before_TOC', True)
+    renderer: str = optional_config.get('renderer', "pageMarkdown+chunks")
+    page_range: Optional[list] = optional_config.get('page_range', None)
+
+    config = {
+        "use_llm": use_llm,
+        "ollama_base_url": ollama_base_url,
+        "ollama_model": ollama_model,
+        "disable_ocr": disable_ocr,
+        "output_json": output_json,
+        "ignore_TOC": ignore_TOC,
+        "ignore_before_TOC": ignore_before_TOC,
+        "renderer": renderer,
+    }
+    if page_range is not None:
+        config["page_range"] = sorted(set(page_range))
+    return config
+
+
+def encode_output(output: dict, response_format: str) -> Response:
+    if response_format == "msgpack":
+        return Response(content=encode_msgpack(output), media_type="application/msgpack")
+    if response_format == "json+zstd":
+        return Response(
+            content=encode_json_zstd(output, app_data["artifacts"]),
+            media_type="application/json",
+            headers={"Content-Encoding": "zstd"},
+        )
+    return JSONResponse(content=output, status_code=200)
+
+
+def pooled_converter(config: dict):
+    registry: ModelRegistry = app_data["models"]
+    return app_data["converters"].converter(
+        config, registry.artifact_dict, generation=registry.generation
+    )
+
+
+async def fetch_document(file_url: str) -> SpooledDocument:
+    """
+    Stream the file at `file_url` through the shared HTTP client.  Small and medium
+    documents stay in memory; larger ones spill to a temporary file.
+    """
+    if not file_url:
+        raise ConversionError("file_url is required")
+
+    document = SpooledDocument()
+    try:
+        async with app_data["http"].stream("GET", file_url) as response:
+            response.raise_for_status()
+
+            # Check if it's a PDF file
+            content_type = response.headers.get('content-type', '')
+            if 'application/pdf' not in content_type and not file_url.lower().endswith('.pdf'):
+                raise ConversionError("URL does not point to a PDF file")
+
+            async for chunk in response.aiter_bytes():
+                document.write(chunk)
+    except httpx.HTTPError as e:
+        document.cleanup()
+        raise ConversionError(f"Failed to download file from URL: {str(e)}")
+    except Exception:
+        document.cleanup()
+        raise
+    return document
+
+
+def convert_document(request: PDFParserConfig, document: SpooledDocument, progress_callback=None) -> dict:
+    """
+    Convert an already downloaded document.  Blocking, so callers on the event loop
+    must run it in a worker thread.
+    """
+    with document:
+        config = build_converter_config(request.optional_config or {})
+        cache = app_data.get("cache")
+        if cache is not None:
+            cache_key = conversion_cache_key(document.source, config, app_data["models"].versions())
+            output = cache.get(cache_key)
+            if output is not None:
+                output.setdefault("metadata", {})["cache"] = "hit"
+                return output
+
+        # Hold back work until the page budget has room for this document
+        pages = count_pages(document.source, config.get("page_range"))
+        with app_data["admission"].reserve(pages):
+            # Reuse a converter built for the same configuration, if one is idle
+            with pooled_converter(config) as converter:
+                converter.progress_callback = progress_callback
+
+                # Run the converter
+                output, _ = converter(document.source)
+        if cache is not None:
+            cache.set(cache_key, output)
+            output.setdefault("metadata", {})["cache"] = "miss"
+        return output
+
+
+def convert_request(request: PDFParserConfig, progress_callback=None) -> dict:
+    """
+    Download and convert the requested PDF from a worker thread.  The download still
+    runs on the event loop, so it shares the app's HTTP connections.
+    """
+    document = asyncio.run_coroutine_threadsafe(
+        fetch_document(request.file_url), app_data["loop"]
+    ).result()
+    return convert_document(request, document, progress_callback=progress_callback)
+
+
+def stream_request(
+    request: PDFParserConfig,
+    document: SpooledDocument,
+    stream_format: str,
+    reservation: Reservation,
+) -> Iterator[str]:
+    """
+    Convert an already downloaded and admitted PDF and yield one NDJSON line or SSE
+    event per page.
+    """
+    with document:
+        try:
+            with pooled_converter(build_converter_config(request.optional_config or {})) as converter:
+                for record in converter.stream(document.source):
+                    yield format_stream_record(record, stream_format)
+        except Exception as e:
+            yield format_stream_record({"event": "error", "error": str(e)}, stream_format)
+        finally:
+            reservation.release()
+
+
+def finish_stream(document: SpooledDocument, reservation: Reservation):
+    # In case the stream never started
+    reservation.release()
+    document.cleanup()
+
+
+def format_stream_record(record: dict, stream_format: str) -> str:
+    data = json.dumps(jsonable_encoder(record))
+    if stream_format == "sse":
+        return f"event: {record['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
 @app.post("/parse-pdf/")
-async def parse_pdf(request: PDFParserConfig):
+async def parse_pdf(
+    request: PDFParserConfig,
+    stream: Annotated[
+        Optional[Literal["ndjson", "sse"]],
+        Query(description="Stream one record per page as NDJSON or server-sent events instead of a single JSON response"),
+    ] = None,
+    response_format: Annotated[
+        ResponseFormat,
+        Query(description="`msgpack` sends images as binary values; `json+zstd` compresses the body and moves images to `/artifacts/{id}`"),
+    ] = "json",
+):
     """
     Download a PDF file from CDN URL and parse it using Marker.
     Provide file URL and optional configuration.
     Returns structured text, markdown, and chunks.
     """
-    tmp_path = None
     try:
-        # Validate and get configuration
-        parser_config = request
-        optional_config = parser_config.optional_config
-        
-        ollama_base_url: str = optional_config.get('ollama_base_url', "http://ollama-keda.mobiusdtaas.ai")
-        ollama_model: str = optional_config.get('ollama_model', "llama3.2:latest")
-        use_llm: bool = optional_config.get('use_llm', False)
-        llm_service: str = optional_config.get('llm_service', 'ollama')
-        if llm_service.lower() == 'ollama':
-            llm_service = 'marker.services.ollama.OllamaService'
-        disable_ocr: bool = optional_config.get('disable_ocr', True)
-        output_json: bool = optional_config.get('output_json', True)
-        ignore_TOC: bool = optional_config.get('ignore_TOC', True)
-        ignore_before_TOC: bool = optional_config.get('ignore_before_TOC', True)
-        renderer: str = optional_config.get('renderer', "pageMarkdown+chunks")
-        output_path: str = optional_config.get('output_path', "./")
-
-        # Download file from CDN URL
-        if not parser_config.file_url:
-            return JSONResponse(content={"error": "file_url is required"}, status_code=400)
-        
-        try:
-            response = requests.get(parser_config.file_url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            # Check if it's a PDF file
-            content_type = response.headers.get('content-type', '')
-            if 'application/pdf' not in content_type and not parser_config.file_url.lower().endswith('.pdf'):
-                return JSONResponse(
-                    content={"error": "URL does not point to a PDF file"}, 
-                    status_code=400
-                )
-            
-        except requests.exceptions.RequestException as e:
-            return JSONResponse(
-                content={"error": f"Failed to download file from URL: {str(e)}"}, 
-                status_code=400
+        document = await fetch_document(request.file_url)
+
+        if stream is not None:
+            # Admission is decided before the response starts, while a 429 can still be sent
+            try:
+                page_range = build_converter_config(request.optional_config or {}).get("page_range")
+                pages = await run_in_threadpool(count_pages, document.source, page_range)
+                reservation = await app_data["admission"].reservation(pages)
+            except Exception:
+                document.cleanup()
+                raise
+
+            media_type = "text/event-stream" if stream == "sse" else "application/x-ndjson"
+            return StreamingResponse(
+                stream_request(request, document, stream, reservation),
+                media_type=media_type,
+                background=BackgroundTask(finish_stream, document, reservation),
             )
 
-        # Save downloaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    tmp.write(chunk)
-            tmp_path = tmp.name
-
-        # Initialize converter with the provided/default configuration
-        converter = PdfConverter(
-            artifact_dict=create_model_dict(),
-            config={
-                "use_llm": use_llm,
-                "ollama_base_url": ollama_base_url,
-                "ollama_model": ollama_model,
-                "disable_ocr": disable_ocr,
-                "output_json": output_json,
-                "ignore_TOC": ignore_TOC,
-                "ignore_before_TOC": ignore_before_TOC,
-                "renderer": renderer,
-            }
+        # Run in a worker thread so one long document does not block the event loop
+        output = await run_in_threadpool(convert_document, request, document)
+        return await run_in_threadpool(encode_output, output, response_format)
+
+    except AdmissionRejected as e:
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
         )
-        
-        # Run the converter
-        output = converter(tmp_path)
 
-        return JSONResponse(content=output, status_code=200)
+    except ConversionError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=e.status_code)
 
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
-    finally:
-        # Clean up temporary file
-        if tmp_path and os.path.exists(tmp_path):
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass  # Ignore cleanup errors
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: PDFParserConfig):
+    """
+    Queue a PDF for conversion and return its job id immediately.
+    Poll `GET /jobs/{job_id}` for status, progress and the result.
+    """
+    try:
+        job = app_data["jobs"].submit(convert_request, request)
+    except JobQueueFull as e:
+        return JSONResponse(content={"error": str(e)}, status_code=429, headers={"Retry-After": "5"})
+    return JSONResponse(content=job.to_dict(include_result=False), status_code=202)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, response_format: Annotated[ResponseFormat, Query()] = "json"):
+    """
+    Status, progress and (once completed) the result of a conversion job.
+    """
+    job = app_data["jobs"].get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"Unknown job: {job_id}"}, status_code=404)
+    if job.status == "completed" and response_format != "json":
+        # Binary formats carry only the conversion result; status is known to be completed
+        return await run_in_threadpool(encode_output, job.result, response_format)
+    return JSONResponse(content=job.to_dict(), status_code=200)
+
+
+@app.get("/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str):
+    """
+    Binary parts (images) of a `json+zstd` response, kept for `ARTIFACT_TTL` seconds.
+    """
+    artifact = app_data["artifacts"].get(artifact_id)
+    if artifact is None:
+        return JSONResponse(content={"error": f"Unknown or expired artifact: {artifact_id}"}, status_code=404)
+    media_type, data = artifact
+    return Response(content=data, media_type=media_type)
+
+
+@app.get("/cache")
+async def cache_stats():
+    """
+    Hit/miss counts and size of the conversion result cache.
+    """
+    cache = app_data.get("cache")
+    if cache is None:
+        return JSONResponse(content={"enabled": False}, status_code=200)
+    return JSONResponse(content={"enabled": True, **cache.stats()}, status_code=200)
+
+
+@app.get("/admission")
+async def admission_stats():
+    """
+    Pages currently being converted against the global page budget.
+    """
+    return JSONResponse(content=app_data["admission"].stats(), status_code=200)
+
+
+@app.get("/converters")
+async def converter_stats():
+    """
+    Reuse of constructed converters, and the construction time that saved.
+    """
+    return JSONResponse(content=app_data["converters"].stats(), status_code=200)
+
+
+@app.get("/models")
+async def model_stats():
+    """
+    Load time and resident memory of each model held by the registry.
+    """
+    return JSONResponse(content=app_data["models"].stats(), status_code=200)
+
+
+@app.post("/models/{model_name}/reload")
+async def reload_model(model_name: str):
+    """
+    Reload a single model in place, without restarting the process.
+    """
+    try:
+        app_data["models"].reload(model_name)
+        app_data["converters"].clear()  # Drop converters still holding the old model
+    except KeyError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=404)
+    return JSONResponse(content=app_data["models"].stats(), status_code=200)
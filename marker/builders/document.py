@@ -1,9 +1,10 @@
-from typing import Annotated, List
+from typing import Annotated, List, Optional, Sequence
 
 from marker.builders import BaseBuilder
 from marker.builders.layout import LayoutBuilder
 from marker.builders.line import LineBuilder
 from marker.builders.ocr import OcrBuilder
+from marker.providers.page_images import PageImageCache
 from marker.providers.pdf import PdfProvider
 from marker.schema import BlockTypes
 from marker.schema.document import Document
@@ -27,6 +28,14 @@ class DocumentBuilder(BaseBuilder):
         bool,
         "Disable OCR processing.",
     ] = True
+    lazy_page_images: Annotated[
+        bool,
+        "Render page images when they are first needed, instead of rendering every page at both resolutions up front.",
+    ] = True
+    page_image_cache_bytes: Annotated[
+        int,
+        "Maximum size of the rendered page images kept in memory when rendering lazily.",
+    ] = 512 * 1024 * 1024
 
     def __init__(self, config = None, **kwargs):
         super().__init__(config)
@@ -38,8 +47,15 @@ class DocumentBuilder(BaseBuilder):
         if config.get('ignore_before_TOC', False):
             self.ignore_before_TOC = config['ignore_before_TOC']
 
-    def __call__(self, provider: PdfProvider, layout_builder: LayoutBuilder, line_builder: LineBuilder, ocr_builder: OcrBuilder):
-        document = self.build_document(provider)
+    def __call__(
+        self,
+        provider: PdfProvider,
+        layout_builder: LayoutBuilder,
+        line_builder: LineBuilder,
+        ocr_builder: OcrBuilder,
+        page_ids: Optional[Sequence[int]] = None,
+    ):
+        document = self.build_document(provider, page_ids)
         layout_builder(document, provider)
         line_builder(document, provider)
         if self.ignore_blocks:
@@ -69,18 +85,40 @@ class DocumentBuilder(BaseBuilder):
                 for block in page.children:
                     block.ignore_for_output = True
 
-    def build_document(self, provider: PdfProvider):
+    def build_document(self, provider: PdfProvider, page_ids: Optional[Sequence[int]] = None):
+        # page_ids restricts the document to a window of the provider's pages
+        page_ids = list(provider.page_range if page_ids is None else page_ids)
         PageGroupClass: PageGroup = get_block_class(BlockTypes.Page)
-        lowres_images = provider.get_images(provider.page_range, self.lowres_image_dpi)
-        highres_images = provider.get_images(provider.page_range, self.highres_image_dpi)
-        initial_pages = [
-            PageGroupClass(
-                page_id=p,
-                lowres_image=lowres_images[i],
-                highres_image=highres_images[i],
-                polygon=provider.get_page_bbox(p),
-                refs=provider.get_page_refs(p)
-            ) for i, p in enumerate(provider.page_range)
-        ]
+        if self.lazy_page_images:
+            image_cache = PageImageCache(
+                provider, self.lowres_image_dpi, self.highres_image_dpi, self.page_image_cache_bytes
+            )
+            initial_pages = [
+                PageGroupClass(
+                    page_id=p,
+                    polygon=provider.get_page_bbox(p),
+                    refs=provider.get_page_refs(p)
+                ) for p in page_ids
+            ]
+            for page in initial_pages:
+                page.set_image_source(image_cache)
+        else:
+            page_images = provider.get_page_images(
+                page_ids, [self.lowres_image_dpi, self.highres_image_dpi]
+            )
+            initial_pages = [
+                PageGroupClass(
+                    page_id=p,
+                    lowres_image=page_images[i][self.lowres_image_dpi],
+                    highres_image=page_images[i][self.highres_image_dpi],
+                    polygon=provider.get_page_bbox(p),
+                    refs=provider.get_page_refs(p)
+                ) for i, p in enumerate(page_ids)
+            ]
         DocumentClass: Document = get_block_class(BlockTypes.Document)
-        return DocumentClass(filepath=provider.filepath, pages=initial_pages)
+        if isinstance(provider.filepath, bytes):
+            document = DocumentClass(filepath="memory.pdf", file_bytes=provider.filepath, pages=initial_pages)
+        else:
+            document = DocumentClass(filepath=provider.filepath, pages=initial_pages)
+        document.set_session(getattr(provider, "session", None))
+        return document
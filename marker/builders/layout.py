@@ -85,6 +85,8 @@ class LayoutBuilder(BaseBuilder):
 
     def surya_layout(self, pages: List[PageGroup]) -> List[LayoutResult]:
         self.layout_model.disable_tqdm = self.disable_tqdm
+        if pages:
+            pages[0].prefetch_images(pages, highres=False)
         layout_results = self.layout_model(
             [p.get_image(highres=False) for p in pages],
             batch_size=int(self.get_batch_size()),
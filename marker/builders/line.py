@@ -1,5 +1,6 @@
+import time
 from copy import deepcopy
-from typing import Annotated, List, Tuple
+from typing import Annotated, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
@@ -7,10 +8,13 @@ import cv2
 
 from surya.detection import DetectionPredictor
 from surya.ocr_error import OCRErrorPredictor
+from surya.ocr_error.schema import OCRErrorDetectionResult
 
 from marker.builders import BaseBuilder
+from marker.logger import get_logger
 from marker.providers import ProviderOutput, ProviderPageLines
 from marker.providers.pdf import PdfProvider
+from marker.providers.utils import TextQuality
 from marker.schema.blocks import PageHeader
 from marker.schema import BlockTypes
 from marker.schema.document import Document
@@ -22,6 +26,8 @@ from marker.settings import settings
 from marker.util import matrix_intersection_area, sort_text_lines
 from marker.utils.image import is_blank_image
 
+logger = get_logger()
+
 
 class LineBuilder(BaseBuilder):
     """
@@ -82,6 +88,27 @@ class LineBuilder(BaseBuilder):
         "Disable OCR for the document. This will only use the lines from the provider.",
     ] = False
     keep_chars: Annotated[bool, "Keep individual characters."] = False
+    ocr_error_gate: Annotated[
+        bool,
+        "Only run the ocr error detection model on pages whose text quality heuristics are inconclusive.",
+    ] = True
+    ocr_clean_min_chars: Annotated[
+        int,
+        "The minimum number of characters for a page's text to be trusted without the ocr error model.",
+    ] = 200
+    ocr_clean_alphanum_threshold: Annotated[
+        float,
+        "The minimum alphanumeric ratio for a page's text to be trusted without the ocr error model.",
+    ] = 0.75
+    ocr_clean_space_range: Annotated[
+        Tuple[float, float],
+        "The range of space ratios for a page's text to be trusted without the ocr error model.",
+        "Running words together or spacing out letters both fall outside it.",
+    ] = (0.08, 0.3)
+    ocr_clean_newline_threshold: Annotated[
+        float,
+        "The maximum newline ratio for a page's text to be trusted without the ocr error model.",
+    ] = 0.05
 
     def __init__(
         self,
@@ -138,7 +165,7 @@ class LineBuilder(BaseBuilder):
 
     def get_all_lines(self, document: Document, provider: PdfProvider):
         ocr_error_detection_results = self.ocr_error_detection(
-            document.pages, provider.page_lines
+            document.pages, provider.page_lines, provider
         )
 
         boxes_to_ocr = {page.page_id: [] for page in document.pages}
@@ -213,7 +240,7 @@ class LineBuilder(BaseBuilder):
         ocr_lines = {document_page.page_id: [] for document_page in document.pages}
         for page_id, page_ocr_boxes in boxes_to_ocr.items():
             page_size = provider.get_page_bbox(page_id).size
-            image_size = document.get_page(page_id).get_image(highres=False).size
+            image_size = document.get_page(page_id).get_image_size(highres=False)
             for box_to_ocr in page_ocr_boxes:
                 line_polygon = PolygonBox(polygon=box_to_ocr.polygon).rescale(
                     image_size, page_size
@@ -232,8 +259,29 @@ class LineBuilder(BaseBuilder):
 
         return page_lines, ocr_lines
 
+    def text_label(self, quality: TextQuality, provider: PdfProvider) -> Optional[str]:
+        """
+        The ocr error label the text quality settles on its own, or None when it
+        takes the model to tell.
+        """
+        if provider.is_bad_text(quality):
+            return "bad"
+        space_min, space_max = self.ocr_clean_space_range
+        if all([
+            quality.length >= self.ocr_clean_min_chars,
+            quality.alphanum_ratio >= self.ocr_clean_alphanum_threshold,
+            space_min <= quality.space_ratio <= space_max,
+            quality.newline_ratio <= self.ocr_clean_newline_threshold,
+            quality.invalid_chars == 0,
+        ]):
+            return "good"
+        return None
+
     def ocr_error_detection(
-        self, pages: List[PageGroup], provider_page_lines: ProviderPageLines
+        self,
+        pages: List[PageGroup],
+        provider_page_lines: ProviderPageLines,
+        provider: Optional[PdfProvider] = None,
     ):
         page_texts = []
         for document_page in pages:
@@ -243,11 +291,37 @@ class LineBuilder(BaseBuilder):
             )
             page_texts.append(page_text)
 
-        self.ocr_error_model.disable_tqdm = self.disable_tqdm
-        ocr_error_detection_results = self.ocr_error_model(
-            page_texts, batch_size=int(self.get_ocr_error_batch_size())
-        )
-        return ocr_error_detection_results
+        labels = [None] * len(page_texts)
+        if self.ocr_error_gate and isinstance(provider, PdfProvider):
+            labels = [
+                self.text_label(provider.text_quality(text), provider)
+                for text in page_texts
+            ]
+
+        # Only the pages the heuristics can't settle go through the model
+        model_idxs = [i for i, label in enumerate(labels) if label is None]
+        model_seconds = 0.0
+        if model_idxs:
+            self.ocr_error_model.disable_tqdm = self.disable_tqdm
+            start = time.perf_counter()
+            model_results = self.ocr_error_model(
+                [page_texts[i] for i in model_idxs],
+                batch_size=int(self.get_ocr_error_batch_size()),
+            )
+            model_seconds = time.perf_counter() - start
+            for i, label in zip(model_idxs, model_results.labels):
+                labels[i] = label
+
+        skipped = len(page_texts) - len(model_idxs)
+        if skipped:
+            if model_idxs:
+                saved = f"~{model_seconds / len(model_idxs) * skipped:.2f}s saved"
+            else:
+                saved = "no model pass"
+            logger.debug(
+                f"OCR error model ran on {len(model_idxs)}/{len(page_texts)} pages, {saved}"
+            )
+        return OCRErrorDetectionResult(texts=page_texts, labels=labels)
 
     def check_line_overlaps(
         self, document_page: PageGroup, provider_lines: List[ProviderOutput]
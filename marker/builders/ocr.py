@@ -119,6 +119,8 @@ class OcrBuilder(BaseBuilder):
         self, document: Document, pages: List[PageGroup], provider: PdfProvider
     ):
         highres_images, highres_polys, block_ids, block_original_texts = [], [], [], []
+        if pages:
+            pages[0].prefetch_images(pages, highres=True)
         for document_page in pages:
             page_highres_image = document_page.get_image(highres=True)
             page_highres_polys = []
@@ -27,19 +27,23 @@ class ConfigCrawler:
         ),
     ):
         self.base_classes = base_classes
-        self.class_config_map: Dict[str, dict] = {}
 
-        self._crawl_config()
+    @cached_property
+    def class_config_map(self) -> Dict[str, dict]:
+        # Crawling imports every component module, so it only happens on first use
+        # instead of whenever the config parser is imported
+        return self._crawl_config()
 
-    def _crawl_config(self):
+    def _crawl_config(self) -> Dict[str, dict]:
+        class_config_map: Dict[str, dict] = {}
         for base in self.base_classes:
             base_class_type = base.__name__.removeprefix("Base")
-            self.class_config_map.setdefault(base_class_type, {})
+            class_config_map.setdefault(base_class_type, {})
             for class_name, class_type in self._find_subclasses(base).items():
                 if class_name.startswith("Base"):
                     continue
 
-                self.class_config_map[base_class_type].setdefault(
+                class_config_map[base_class_type].setdefault(
                     class_name, {"class_type": class_type, "config": {}}
                 )
                 for attr, attr_type in self._gather_super_annotations(
@@ -56,9 +60,10 @@ class ConfigCrawler:
                         attr_type = get_args(attr_type)[0]
 
                     formatted_type = self._format_type(attr_type)
-                    self.class_config_map[base_class_type][class_name]["config"][
+                    class_config_map[base_class_type][class_name]["config"][
                         attr
                     ] = (attr_type, formatted_type, default, metadata)
+        return class_config_map
 
     @staticmethod
     def _gather_super_annotations(cls: Type) -> Dict[str, Type]:
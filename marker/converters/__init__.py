@@ -21,6 +21,10 @@ class BaseConverter:
     def __call__(self, *args, **kwargs):
         raise NotImplementedError
 
+    def reset(self):
+        # Clear per-document state, so the instance can be reused for another document
+        pass
+
     def resolve_dependencies(self, cls):
         init_signature = inspect.signature(cls.__init__)
         parameters = init_signature.parameters
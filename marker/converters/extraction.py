@@ -14,6 +14,7 @@ from marker.renderers.extraction import ExtractionRenderer, ExtractionOutput
 from marker.renderers.markdown import MarkdownRenderer
 
 from marker.logger import get_logger
+from marker.util import load_class
 
 logger = get_logger()
 
@@ -60,7 +61,7 @@ class ExtractionConverter(PdfConverter):
         # This needs an LLM service for extraction, this sets it in the extractor
         if self.artifact_dict.get("llm_service") is None:
             self.artifact_dict["llm_service"] = self.resolve_dependencies(
-                self.default_llm_service
+                load_class(self.default_llm_service)
             )
 
         page_extractor = self.resolve_dependencies(PageExtractor)
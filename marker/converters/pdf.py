@@ -6,7 +6,8 @@ import json
 os.environ["TOKENIZERS_PARALLELISM"] = "false"  # disables a tokenizers warning
 
 from collections import defaultdict
-from typing import Annotated, Any, Dict, List, Optional, Type, Tuple, Union
+from copy import deepcopy
+from typing import Annotated, Any, Callable, Dict, Iterator, List, Optional, Type, Tuple, Union
 import io
 from contextlib import contextmanager
 import tempfile
@@ -14,7 +15,9 @@ import tempfile
 from marker.processors import BaseProcessor
 from marker.services import BaseService
 from marker.processors.llm.llm_table_merge import LLMTableMergeProcessor
-from marker.providers.registry import provider_from_filepath
+import filetype.match as file_match
+
+from marker.providers.registry import load_matchers, provider_from_filepath
 from marker.renderers.chunk import ChunkRenderer
 from marker.builders.document import DocumentBuilder
 from marker.builders.layout import LayoutBuilder
@@ -51,10 +54,10 @@ from marker.schema.document import Document
 from marker.schema import BlockTypes
 from marker.schema.blocks import Block
 from marker.schema.registry import register_block_class
-from marker.util import strings_to_classes
+from marker.settings import settings
+from marker.util import load_class, strings_to_classes
 from marker.processors.llm.llm_handwriting import LLMHandwritingProcessor
 from marker.processors.order import OrderProcessor
-from marker.services.gemini import GoogleGeminiService
 from marker.processors.line_merge import LineMergeProcessor
 from marker.processors.llm.llm_mathblock import LLMMathBlockProcessor
 from marker.processors.llm.llm_page_correction import LLMPageCorrectionProcessor
@@ -196,6 +199,17 @@ class PdfConverter(BaseConverter):
         bool,
         "Enable higher quality processing with LLMs.",
     ] = False
+    inmemory_max_bytes: Annotated[
+        int,
+        "PDFs passed as bytes up to this size are opened from memory.",
+        "Larger inputs are written to a temporary file first.",
+    ] = settings.INMEMORY_MAX_BYTES
+    window_pages: Annotated[
+        Optional[int],
+        "When streaming, build, process and render documents this many pages at a time,",
+        "so memory depends on the window size instead of the page count.",
+        "Default is None, which builds the whole document at once.",
+    ] = settings.STREAM_WINDOW_PAGES
     
     default_processors: Tuple[BaseProcessor, ...] = (
         OrderProcessor,
@@ -227,7 +241,7 @@ class PdfConverter(BaseConverter):
         BlankPageProcessor,
         DebugProcessor,
     )
-    default_llm_service: BaseService = GoogleGeminiService
+    default_llm_service: Type[BaseService] | str = "marker.services.gemini.GoogleGeminiService"
 
     def __init__(
         self,
@@ -278,7 +292,7 @@ class PdfConverter(BaseConverter):
             llm_service_cls = strings_to_classes([llm_service])[0]
             llm_service = self.resolve_dependencies(llm_service_cls)
         elif config.get("use_llm", False):
-            llm_service = self.resolve_dependencies(self.default_llm_service)
+            llm_service = self.resolve_dependencies(load_class(self.default_llm_service))
 
         # Inject llm service into artifact_dict so it can be picked up by processors, etc.
         self.artifact_dict["llm_service"] = llm_service
@@ -291,47 +305,125 @@ class PdfConverter(BaseConverter):
 
         self.layout_builder_class = LayoutBuilder
         self.page_count = None  # Track how many pages were converted
+        # Optional hook called as progress_callback(stage, fraction) while converting
+        self.progress_callback: Optional[Callable[[str, float], None]] = None
+
+    def reset(self):
+        self.page_count = None
+        self.progress_callback = None
+
+    def report_progress(self, stage: str, fraction: float):
+        if self.progress_callback is not None:
+            self.progress_callback(stage, fraction)
 
     @contextmanager
-    def filepath_to_str(self, file_input: Union[str, io.BytesIO]):
+    def filepath_to_str(self, file_input: Union[str, bytes, io.BytesIO]):
+        """
+        Yields something a provider can open.  Paths pass through untouched, PDFs up to
+        `inmemory_max_bytes` stay in memory as bytes, anything else is spilled to a
+        temporary file.
+        """
         temp_file = None
         try:
             if isinstance(file_input, str):
                 yield file_input
+                return
+
+            if isinstance(file_input, io.BytesIO):
+                file_bytes = file_input.getvalue()
+            elif isinstance(file_input, (bytes, bytearray)):
+                file_bytes = bytes(file_input)
             else:
-                with tempfile.NamedTemporaryFile(
-                    delete=False, suffix=".pdf"
-                ) as temp_file:
-                    if isinstance(file_input, io.BytesIO):
-                        file_input.seek(0)
-                        temp_file.write(file_input.getvalue())
-                    else:
-                        raise TypeError(
-                            f"Expected str or BytesIO, got {type(file_input)}"
-                        )
-
-                yield temp_file.name
+                raise TypeError(
+                    f"Expected str, bytes or BytesIO, got {type(file_input)}"
+                )
+
+            if len(file_bytes) <= self.inmemory_max_bytes and file_match(file_bytes, load_matchers("pdf")) is not None:
+                yield file_bytes
+                return
+
+            with tempfile.NamedTemporaryFile(
+                delete=False, suffix=".pdf"
+            ) as temp_file:
+                temp_file.write(file_bytes)
+            del file_bytes
+
+            yield temp_file.name
         finally:
             if temp_file is not None and os.path.exists(temp_file.name):
                 os.unlink(temp_file.name)
 
-    def build_document(self, filepath: str):
+    def build_document(self, filepath: str | bytes):
         provider_cls = provider_from_filepath(filepath)
         layout_builder = self.resolve_dependencies(self.layout_builder_class)
         line_builder = self.resolve_dependencies(LineBuilder)
         ocr_builder = self.resolve_dependencies(OcrBuilder)
         provider = provider_cls(filepath, self.config)
+        self.report_progress("provider", 0.1)
         document = DocumentBuilder(self.config, ignore_blocks=self.ignore_blocks)(
             provider, layout_builder, line_builder, ocr_builder
         )
         structure_builder_cls = self.resolve_dependencies(StructureBuilder)
         structure_builder_cls(document)
+        self.report_progress("layout", 0.5)
 
-        for processor in self.processor_list:
+        for i, processor in enumerate(self.processor_list):
             processor(document)
+            self.report_progress("processors", 0.5 + 0.4 * (i + 1) / len(self.processor_list))
 
         return document
 
+    def build_windows(self, filepath: str | bytes) -> Iterator[Tuple[Document, List[int]]]:
+        """
+        Builds and processes the document `window_pages` pages at a time, yielding each
+        window's document with the ids of the pages it covers.  Each window also holds
+        the first page of the next one, so text can continue across the boundary; that
+        page is built again with its own window.  State processors need from earlier
+        pages is carried through `Document.carry_state`.
+        """
+        provider_cls = provider_from_filepath(filepath)
+        layout_builder = self.resolve_dependencies(self.layout_builder_class)
+        line_builder = self.resolve_dependencies(LineBuilder)
+        ocr_builder = self.resolve_dependencies(OcrBuilder)
+        structure_builder = self.resolve_dependencies(StructureBuilder)
+        document_builder = DocumentBuilder(self.config, ignore_blocks=self.ignore_blocks)
+        provider = provider_cls(filepath, self.config)
+        self.report_progress("provider", 0.1)
+
+        page_ids = list(provider.page_range)
+        self.page_count = len(page_ids)
+        window_size = max(1, self.window_pages)
+        carry_state: Dict[str, Any] = {}
+        try:
+            for start in range(0, len(page_ids), window_size):
+                window = page_ids[start:start + window_size]
+                lookahead = page_ids[start + window_size:start + window_size + 1]
+                # Building a page assigns block ids and structure on the provider's lines, so
+                # the lookahead page is built from a copy and its own window gets fresh lines
+                pristine = {p: deepcopy(provider.page_lines.get(p, [])) for p in lookahead}
+                document = document_builder(
+                    provider, layout_builder, line_builder, ocr_builder, page_ids=window + lookahead
+                )
+                document.carry_state = carry_state
+                structure_builder(document)
+                for processor in self.processor_list:
+                    processor(document)
+
+                yield document, window
+
+                provider.release_pages(window)
+                provider.page_lines.update(pristine)
+                del document
+        finally:
+            # Also runs when the consumer stops early, like a client disconnecting mid-stream
+            provider.close()
+
+    @staticmethod
+    def close_session(document: Document):
+        # Frees the parsed PDF once rendering is done; it is reopened if the document is used again
+        if document.session is not None:
+            document.session.close()
+
     def render(self, renderer_cls: Type[BaseRenderer], document: Document) -> Tuple[str, Any, Dict[str, Any]]:
         renderer = self.resolve_dependencies(renderer_cls)
         if renderer_cls.__name__ == "PageMarkdownRenderer":
@@ -396,9 +488,111 @@ class PdfConverter(BaseConverter):
 
         return out_render
 
-    def __call__(self, filepath: str | io.BytesIO):
+    def render_pages(self, document: Document, page_ids: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Render the document one page at a time, yielding each page's markdown, chunks
+        and structure as soon as it is ready.  `page_ids` limits rendering to those
+        pages, continuing the section hierarchy from the previously rendered window.
+        """
+        page_renderer = self.resolve_dependencies(PageMarkdownRenderer)
+        chunk_renderer = self.resolve_dependencies(ChunkRenderer)
+        pages = None
+        if page_ids is not None:
+            page_ids = set(page_ids)
+            pages = [page for page in document.pages if page.page_id in page_ids]
+        rendered_pages = document.render_pages(
+            page_renderer.block_config,
+            section_hierarchy=document.carry_state.get("section_hierarchy"),
+            pages=pages,
+        )
+        for page, page_output in rendered_pages:
+            document.carry_state["section_hierarchy"] = page_output.section_hierarchy.copy()
+            page_render, images = page_renderer.render_page(document, page, page_output)
+            chunks = chunk_renderer.page_chunks(document, page_output)
+            if chunk_renderer.output_json:
+                chunks, chunk_images = chunk_renderer.chunks_to_json(chunks)
+                images.update(chunk_images)
+            else:
+                chunks = [chunk.model_dump() for chunk in chunks]
+
+            if page.ignore_for_output:
+                page_structure = []
+            else:
+                page_structure = [str(identity) for identity in page.structure]
+
+            yield {
+                "page_id": page.page_id,
+                "page_structure": page_structure,
+                "markdown": page_render["markdown"],
+                "html": page_render["html"],
+                "chunks": chunks,
+                "images": images,
+            }
+
+    def stream(self, filepath: str | bytes | io.BytesIO) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of `__call__`.  Yields one `page` record per page, then a
+        final `end` record with the document metadata.
+        """
+        if self.window_pages:
+            yield from self.stream_windows(filepath)
+            return
+
+        with self.filepath_to_str(filepath) as temp_path:
+            document = self.build_document(temp_path)
+            self.page_count = len(document.pages)
+            for i, page_record in enumerate(self.render_pages(document)):
+                self.report_progress("rendering", 0.9 + 0.1 * (i + 1) / self.page_count)
+                yield {"event": "page", **page_record}
+
+            metadata_renderer = self.resolve_dependencies(PageMarkdownRenderer)
+            metadata = metadata_renderer.generate_document_metadata(document, None)
+            self.close_session(document)
+            yield {
+                "event": "end",
+                "page_count": self.page_count,
+                "metadata": metadata,
+            }
+
+    def stream_windows(self, filepath: str | bytes | io.BytesIO) -> Iterator[Dict[str, Any]]:
+        """
+        `stream` for `window_pages`: only one window of pages is held in memory at a time.
+        The table of contents and page stats of the `end` record are collected window by
+        window.
+        """
+        metadata_renderer = self.resolve_dependencies(PageMarkdownRenderer)
+        table_of_contents, page_stats = [], []
+        debug_data_path = None
+        rendered = 0
+        with self.filepath_to_str(filepath) as temp_path:
+            for document, window in self.build_windows(temp_path):
+                for page_record in self.render_pages(document, window):
+                    rendered += 1
+                    self.report_progress("rendering", 0.1 + 0.9 * rendered / self.page_count)
+                    yield {"event": "page", **page_record}
+
+                window_ids = set(window)
+                metadata = metadata_renderer.generate_document_metadata(document, None)
+                table_of_contents.extend(
+                    item for item in metadata["table_of_contents"] or [] if item["page_id"] in window_ids
+                )
+                page_stats.extend(stats for stats in metadata["page_stats"] if stats["page_id"] in window_ids)
+                debug_data_path = metadata.get("debug_data_path", debug_data_path)
+
+        metadata = {"table_of_contents": table_of_contents, "page_stats": page_stats}
+        if debug_data_path is not None:
+            metadata["debug_data_path"] = debug_data_path
+        yield {
+            "event": "end",
+            "page_count": self.page_count,
+            "metadata": metadata,
+        }
+
+    def __call__(self, filepath: str | bytes | io.BytesIO):
         with self.filepath_to_str(filepath) as temp_path:
             document = self.build_document(temp_path)
             self.page_count = len(document.pages)
             out_render = self.render_document(document)
+            self.close_session(document)
+            self.report_progress("rendered", 1.0)
         return out_render, document
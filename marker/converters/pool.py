@@ -0,0 +1,120 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type
+
+from marker.converters import BaseConverter
+from marker.logger import get_logger
+
+logger = get_logger()
+
+
+def config_fingerprint(converter_cls: Type[BaseConverter], config: dict, generation: int = 0) -> str:
+    normalized = json.dumps(
+        {
+            "converter": f"{converter_cls.__module__}.{converter_cls.__name__}",
+            "config": config,
+            "generation": generation,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class ConverterPool:
+    """
+    Keeps constructed converters around, keyed by a fingerprint of their effective
+    config, so requests with a config seen before skip font checks, dependency
+    resolution and processor setup.  A converter is checked out by one request at a
+    time and its per-document state is reset before it is handed out again.
+
+    `generation` should change whenever the models behind `artifact_factory` change,
+    so converters holding stale models are never reused.
+    """
+
+    def __init__(self, converter_cls: Type[BaseConverter], max_idle_per_key: int = 2, max_keys: int = 16):
+        self.converter_cls = converter_cls
+        self.max_idle_per_key = max_idle_per_key
+        self.max_keys = max_keys
+        self._idle: OrderedDict[str, List[BaseConverter]] = OrderedDict()
+        self._construct_time: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.construct_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def _checkout(self, key: str) -> Optional[BaseConverter]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if not idle:
+                self.misses += 1
+                return None
+            self._idle.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += self._construct_time.get(key, 0.0)
+            return idle.pop()
+
+    def _checkin(self, key: str, converter: BaseConverter):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append(converter)
+
+            while len(self._idle) > self.max_keys:
+                evicted_key, _ = self._idle.popitem(last=False)
+                self._construct_time.pop(evicted_key, None)
+
+    def _construct(self, key: str, config: dict, artifact_factory: Callable[[], dict], **kwargs) -> BaseConverter:
+        start = time.perf_counter()
+        converter = self.converter_cls(
+            artifact_dict=artifact_factory(),
+            config=dict(config),  # Converters may pop keys from their config
+            **kwargs,
+        )
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._construct_time[key] = elapsed
+            self.construct_seconds += elapsed
+        return converter
+
+    @contextmanager
+    def converter(
+        self,
+        config: dict,
+        artifact_factory: Callable[[], dict],
+        generation: int = 0,
+        **kwargs,
+    ) -> Iterator[BaseConverter]:
+        key = config_fingerprint(self.converter_cls, {"config": config, **kwargs}, generation)
+        converter = self._checkout(key)
+        if converter is None:
+            converter = self._construct(key, config, artifact_factory, **kwargs)
+        converter.reset()
+
+        try:
+            yield converter
+        finally:
+            converter.reset()
+            self._checkin(key, converter)
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+            self._construct_time.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "configs": len(self._idle),
+                "idle_converters": sum(len(idle) for idle in self._idle.values()),
+                "construct_seconds": round(self.construct_seconds, 3),
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
@@ -1,20 +1,514 @@
 import os
 os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1" # Transformers uses .isin for an op, which is not supported on MPS
 
+import gc
+import threading
+import time
+import weakref
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
+
 from surya.foundation import FoundationPredictor
 from surya.detection import DetectionPredictor
 from surya.layout import LayoutPredictor
 from surya.ocr_error import OCRErrorPredictor
 from surya.recognition import RecognitionPredictor
+from surya.settings import settings as surya_settings
 from surya.table_rec import TableRecPredictor
 
-def create_model_dict(device=None, dtype=None) -> dict:
-    foundation_predictor = FoundationPredictor(device=device, dtype=dtype)
-    return {
-        "foundation_model": foundation_predictor,
-        "layout_model": LayoutPredictor(device=device, dtype=dtype),
-        "recognition_model": RecognitionPredictor(foundation_predictor),
-        "table_rec_model": TableRecPredictor(device=device, dtype=dtype),
-        "detection_model": DetectionPredictor(device=device, dtype=dtype),
-        "ocr_error_model": OCRErrorPredictor(device=device, dtype=dtype)
-    }
\ No newline at end of file
+from marker.logger import get_logger
+from marker.settings import settings
+from marker.utils.batch import BatchingPredictor
+from marker.utils.onnx_backend import BACKENDS, ONNX_MODELS, OnnxForward, apply_onnx_backend
+from marker.utils.precision import QUANTIZABLE_MODELS, apply_precision, cpu_supports_bf16
+
+logger = get_logger()
+
+# Each loader receives the device, dtype and the models loaded so far, so dependent
+# predictors (recognition shares the foundation model) can reuse what is already there.
+MODEL_LOADERS: Dict[str, Callable] = {
+    "foundation_model": lambda device, dtype, models: FoundationPredictor(device=device, dtype=dtype),
+    "layout_model": lambda device, dtype, models: LayoutPredictor(device=device, dtype=dtype),
+    "recognition_model": lambda device, dtype, models: RecognitionPredictor(models["foundation_model"]),
+    "table_rec_model": lambda device, dtype, models: TableRecPredictor(device=device, dtype=dtype),
+    "detection_model": lambda device, dtype, models: DetectionPredictor(device=device, dtype=dtype),
+    "ocr_error_model": lambda device, dtype, models: OCRErrorPredictor(device=device, dtype=dtype),
+}
+
+MODEL_DEPENDENCIES: Dict[str, List[str]] = {
+    "recognition_model": ["foundation_model"],
+}
+
+# The surya setting naming each model's checkpoint; recognition runs on the foundation model
+MODEL_CHECKPOINTS: Dict[str, str] = {
+    "foundation_model": "FOUNDATION_MODEL_CHECKPOINT",
+    "layout_model": "LAYOUT_MODEL_CHECKPOINT",
+    "recognition_model": "FOUNDATION_MODEL_CHECKPOINT",
+    "table_rec_model": "TABLE_REC_MODEL_CHECKPOINT",
+    "detection_model": "DETECTOR_MODEL_CHECKPOINT",
+    "ocr_error_model": "OCR_ERROR_MODEL_CHECKPOINT",
+}
+
+# Models whose calls can be merged across concurrent conversions: the keyword each
+# one takes its batch size from, and the arguments holding one entry per input item.
+# Other list arguments, like recognition's filter_tag_list, are shared by the call.
+BATCHABLE_MODELS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "layout_model": ("batch_size", ("images",)),
+    "detection_model": ("batch_size", ("images",)),
+    "recognition_model": (
+        "recognition_batch_size",
+        ("images", "task_names", "highres_images", "bboxes", "polygons", "input_text"),
+    ),
+    "ocr_error_model": ("batch_size", ("texts",)),
+}
+
+
+def model_checkpoint(name: str) -> str:
+    return getattr(surya_settings, MODEL_CHECKPOINTS.get(name, ""), None) or name
+
+
+def expected_model_version(
+    name: str, device=None, precision: Optional[str] = None, backend: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    The version `load_model` is going to produce, worked out without loading the
+    model, so models that haven't been loaded lazily yet still key the result cache.
+    """
+    device = str(device or settings.TORCH_DEVICE_MODEL)
+    backend = backend or settings.INFERENCE_BACKEND
+    on_cpu = "cpu" in device
+    if backend == "onnx" and on_cpu and name in ONNX_MODELS:
+        return {"checkpoint": model_checkpoint(name), "precision": "float32", "backend": "onnx"}
+
+    applied = "float32"
+    # Recognition has no module of its own, its precision is the foundation model's
+    if on_cpu and name not in MODEL_DEPENDENCIES:
+        if precision == "int8" and name in QUANTIZABLE_MODELS:
+            applied = "int8"
+        elif precision == "bfloat16" and cpu_supports_bf16():
+            applied = "bfloat16"
+    return {"checkpoint": model_checkpoint(name), "precision": applied, "backend": "torch"}
+
+
+def model_versions(models: dict) -> Dict[str, Any]:
+    """
+    Identifies the checkpoint behind each model, the precision it runs at and the
+    backend that runs it, so cached results can be invalidated when a model changes.
+    """
+    try:
+        surya_version = metadata.version("surya-ocr")
+    except metadata.PackageNotFoundError:
+        surya_version = "unknown"
+
+    versions: Dict[str, Any] = {"surya": surya_version}
+    for name, model in models.items():
+        if isinstance(model, LazyModel):
+            if not model.loaded:
+                versions[name] = dict(model._version)
+                continue
+            model = model._model
+        forward = getattr(getattr(model, "model", None), "forward", None)
+        versions[name] = {
+            "checkpoint": model_checkpoint(name),
+            "precision": getattr(model, "_marker_precision", "float32"),
+            "backend": forward.backend if isinstance(forward, OnnxForward) else "torch",
+        }
+    return versions
+
+
+class LazyModel:
+    """
+    Stands in for a predictor in the artifact dict and loads it on first use, so
+    models a conversion never touches (table recognition on table-free documents, OCR
+    models with `disable_ocr`) are never loaded.  Attributes set before the model is
+    loaded, like `disable_tqdm`, are applied once it is.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], version: Optional[Dict[str, str]] = None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_loader", loader)
+        object.__setattr__(self, "_version", version or expected_model_version(name))
+        object.__setattr__(self, "_load_seconds", None)
+        object.__setattr__(self, "_model", None)
+        object.__setattr__(self, "_pending_attrs", {})
+        object.__setattr__(self, "_last_used", time.monotonic())
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_evictor", None)
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def __wrapped__(self):
+        # Lets BatchingPredictor read the predictor's call signature
+        return self._load()
+
+    def _load(self):
+        object.__setattr__(self, "_last_used", time.monotonic())
+        model = self._model
+        if model is not None:
+            return model
+
+        with self._lock:
+            if self._model is None:
+                start = time.perf_counter()
+                model = self._loader()
+                for attr, value in self._pending_attrs.items():
+                    setattr(model, attr, value)
+                object.__setattr__(self, "_model", model)
+                object.__setattr__(self, "_load_seconds", round(time.perf_counter() - start, 3))
+                logger.info(f"Loaded {self._name} on first use in {self._load_seconds:.2f}s")
+            return self._model
+
+    def _unload(self):
+        with self._lock:
+            object.__setattr__(self, "_model", None)
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        with self._lock:
+            if self._model is None:
+                self._pending_attrs[attr] = value
+                return
+        setattr(self._model, attr, value)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModel {self._name} ({state})>"
+
+
+class IdleModelEvictor:
+    """
+    Frees lazily loaded models nobody has used for `ttl` seconds.  They are loaded
+    again on their next use.  A model stays loaded while a loaded model depends on it,
+    since the dependent holds a reference to it anyway.
+    """
+
+    def __init__(self, models: Dict[str, LazyModel], ttl: float, interval: Optional[float] = None):
+        self.models = models
+        self.ttl = ttl
+        self.interval = interval or max(1.0, ttl / 4)
+        self._stop = threading.Event()
+        # The thread only holds a weak reference, so it never keeps the models alive
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(weakref.ref(self), self._stop, self.interval),
+            name="model-evictor",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @staticmethod
+    def _run(evictor_ref, stop: threading.Event, interval: float):
+        while not stop.wait(interval):
+            evictor = evictor_ref()
+            if evictor is None:
+                return
+            evictor.evict_idle()
+            del evictor
+
+    def evict_idle(self) -> List[str]:
+        now = time.monotonic()
+        evicted = []
+        # The registry replaces models on reload, so iterate over a snapshot
+        for name, model in list(self.models.items()):
+            if not isinstance(model, LazyModel) or not model.loaded or now - model._last_used < self.ttl:
+                continue
+            dependents = [
+                dependent
+                for dependent, deps in MODEL_DEPENDENCIES.items()
+                if name in deps and getattr(self.models.get(dependent), "loaded", True)
+            ]
+            if dependents:
+                continue
+            model._unload()
+            evicted.append(name)
+
+        if evicted:
+            gc.collect()
+            logger.info(f"Unloaded idle models: {', '.join(evicted)}")
+        return evicted
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+def release_models(models: dict):
+    """
+    Stops the idle evictor of a dict from `create_model_dict` and frees its lazily
+    loaded models.  Eagerly loaded models are left to the caller.
+    """
+    for model in models.values():
+        if not isinstance(model, LazyModel):
+            continue
+        if model._evictor is not None:
+            model._evictor.stop()
+            object.__setattr__(model, "_evictor", None)
+        model._unload()
+    gc.collect()
+
+
+def _lazy_loader(
+    name: str,
+    device,
+    dtype,
+    precision: Optional[str],
+    backend: Optional[str],
+    models: Dict[str, LazyModel],
+) -> Callable[[], Any]:
+    def load():
+        deps = {dep: models[dep]._load() for dep in MODEL_DEPENDENCIES.get(name, [])}
+        return load_model(name, device, dtype, deps, precision, backend)
+
+    return load
+
+
+def load_model(
+    name: str,
+    device=None,
+    dtype=None,
+    models: Optional[dict] = None,
+    precision: Optional[str] = None,
+    backend: Optional[str] = None,
+):
+    model = MODEL_LOADERS[name](device, dtype, models if models is not None else {})
+    device = device or settings.TORCH_DEVICE_MODEL
+    backend = backend or settings.INFERENCE_BACKEND
+
+    # Recorded for model_versions, the results of a model depend on it
+    model._marker_precision = "float32"
+    if backend == "onnx" and apply_onnx_backend(name, model, device):
+        logger.info(f"Running {name} with onnxruntime")
+        return model
+    elif backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    applied = apply_precision(name, model, precision, device)
+    if applied not in (None, "float32"):
+        model._marker_precision = applied
+        logger.info(f"Running {name} at {applied} precision")
+    return model
+
+
+def create_model_dict(
+    device=None,
+    dtype=None,
+    lazy: Optional[bool] = None,
+    idle_ttl: Optional[float] = None,
+    precision: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> dict:
+    if lazy is None:
+        lazy = settings.LAZY_MODEL_LOADING
+    if precision is None:
+        precision = settings.MODEL_PRECISION
+
+    models = {}
+    if not lazy:
+        for name in MODEL_LOADERS:
+            models[name] = load_model(name, device, dtype, models, precision, backend)
+        return models
+
+    for name in MODEL_LOADERS:
+        models[name] = LazyModel(
+            name,
+            _lazy_loader(name, device, dtype, precision, backend, models),
+            expected_model_version(name, device, precision, backend),
+        )
+
+    idle_ttl = settings.MODEL_IDLE_TTL if idle_ttl is None else idle_ttl
+    if idle_ttl:
+        evictor = IdleModelEvictor(models, idle_ttl)
+        # Kept alive by the models it watches, and stopped by release_models
+        for model in models.values():
+            object.__setattr__(model, "_evictor", evictor)
+    return models
+
+
+def share_model_memory(models: dict) -> int:
+    """
+    Moves the weights of every loaded predictor into shared memory, so processes the
+    models are sent to map the same pages instead of holding their own copy.  Returns
+    the number of bytes shared.
+    """
+    import torch
+
+    shared = 0
+    seen = set()
+    for model in models.values():
+        module = getattr(model, "model", None)
+        if not isinstance(module, torch.nn.Module) or id(module) in seen:
+            continue
+        seen.add(id(module))
+        module.share_memory()
+        shared += sum(t.numel() * t.element_size() for t in module.state_dict().values())
+    return shared
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the surya predictors.  Models are loaded once and shared
+    across requests; every caller gets its own artifact dict, so per-converter entries
+    like `llm_service` never leak into the shared models.  With `lazy`, each model is
+    only loaded by the first request that uses it, and models idle for `idle_ttl`
+    seconds are freed again.
+    """
+
+    def __init__(
+        self,
+        device=None,
+        dtype=None,
+        batching: bool = False,
+        batch_max_wait: float = 0.02,
+        lazy: Optional[bool] = None,
+        idle_ttl: Optional[float] = None,
+    ):
+        self.device = device
+        self.dtype = dtype
+        self.batching = batching
+        self.batch_max_wait = batch_max_wait
+        self.lazy = settings.LAZY_MODEL_LOADING if lazy is None else lazy
+        self.idle_ttl = settings.MODEL_IDLE_TTL if idle_ttl is None else idle_ttl
+        self._evictor: Optional[IdleModelEvictor] = None
+        self.generation = 0  # Bumped on every reload, so holders of old models can tell
+        self._models: Dict[str, object] = {}
+        self._batchers: Dict[str, BatchingPredictor] = {}
+        self._stats: Dict[str, dict] = {}
+        self._warmup: Dict[str, dict] = {}
+        self._warmup_compile = False
+        self._lock = threading.RLock()
+
+    def load(self) -> "ModelRegistry":
+        with self._lock:
+            for name in MODEL_LOADERS:
+                if name not in self._models:
+                    self._load_model(name)
+            if self.lazy and self.idle_ttl and self._evictor is None:
+                self._evictor = IdleModelEvictor(self._models, self.idle_ttl)
+        return self
+
+    def _add_batcher(self, name: str, model):
+        if self.batching and name in BATCHABLE_MODELS:
+            batch_size_kwarg, item_args = BATCHABLE_MODELS[name]
+            self._batchers[name] = BatchingPredictor(
+                model, item_args, batch_size_kwarg=batch_size_kwarg, max_wait=self.batch_max_wait
+            )
+
+    def _load_model(self, name: str):
+        reloads = self._stats.get(name, {}).get("reloads", -1) + 1
+        if self.lazy:
+            loader = _lazy_loader(name, self.device, self.dtype, settings.MODEL_PRECISION, None, self._models)
+            version = expected_model_version(name, self.device, settings.MODEL_PRECISION)
+            self._models[name] = LazyModel(name, loader, version)
+            self._add_batcher(name, self._models[name])
+            self._stats[name] = {"reloads": reloads}
+            return
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        start = time.perf_counter()
+
+        model = load_model(name, self.device, self.dtype, self._models, settings.MODEL_PRECISION)
+
+        load_time = time.perf_counter() - start
+        self._models[name] = model
+        self._add_batcher(name, model)
+        self._stats[name] = {
+            "load_time": round(load_time, 3),
+            "rss_delta_mb": round((process.memory_info().rss - rss_before) / 2**20, 1),
+            "loaded_at": time.time(),
+            "reloads": reloads,
+        }
+        logger.info(f"Loaded {name} in {load_time:.2f}s")
+
+    def _dependents(self, name: str) -> List[str]:
+        return [
+            model_name
+            for model_name, deps in MODEL_DEPENDENCIES.items()
+            if name in deps
+        ]
+
+    def reload(self, name: str):
+        if name not in MODEL_LOADERS:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._lock:
+            # Requests already in flight keep their own reference to the old model
+            to_reload = [name] + self._dependents(name)
+            for model_name in to_reload:
+                self._models.pop(model_name, None)
+                self._stop_batcher(model_name)
+            gc.collect()
+
+            for model_name in to_reload:
+                self._load_model(model_name)
+            if self._warmup:
+                self._run_warmup(to_reload)
+            self.generation += 1
+
+    def warmup(self, compile: bool = False) -> Dict[str, dict]:
+        with self._lock:
+            self._warmup_compile = compile
+            return self._run_warmup(list(self._models))
+
+    def _run_warmup(self, names: List[str]) -> Dict[str, dict]:
+        from marker.utils.warmup import warmup_models
+
+        # Warming up a lazy model would load it, so only the loaded ones are warmed
+        names = [
+            name for name in names
+            if not isinstance(self._models.get(name), LazyModel) or self._models[name].loaded
+        ]
+        timings = warmup_models(self._models, names=names, compile=self._warmup_compile)
+        self._warmup.update(timings)
+        return timings
+
+    def _stop_batcher(self, name: str):
+        batcher = self._batchers.pop(name, None)
+        if batcher is not None:
+            batcher.stop()
+
+    def artifact_dict(self) -> dict:
+        with self._lock:
+            # Batching wrappers stand in for the raw predictors when enabled
+            return {**self._models, **self._batchers}
+
+    def versions(self) -> Dict[str, str]:
+        with self._lock:
+            return model_versions(self._models)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            models = {}
+            for name, stat in self._stats.items():
+                models[name] = dict(stat)
+                model = self._models.get(name)
+                if isinstance(model, LazyModel):
+                    models[name].update(loaded=model.loaded, load_time=model._load_seconds)
+            return {
+                "models": models,
+                "batching": {name: batcher.stats() for name, batcher in self._batchers.items()},
+                "warmup": {name: dict(timing) for name, timing in self._warmup.items()},
+                "rss_mb": round(psutil.Process().memory_info().rss / 2**20, 1),
+            }
+
+    def unload(self):
+        with self._lock:
+            for name in list(self._batchers):
+                self._stop_batcher(name)
+            if self._evictor is not None:
+                self._evictor.stop()
+                self._evictor = None
+            release_models(self._models)
+            self._models.clear()
+            gc.collect()
@@ -95,7 +95,7 @@ class DebugProcessor(BaseProcessor):
 
     def draw_layout_debug_images(self, document: Document, pdf_mode=False):
         for page in document.pages:
-            img_size = page.get_image(highres=True).size
+            img_size = page.get_image_size(highres=True)
             png_image = Image.new("RGB", img_size, color="white")
 
             line_bboxes = []
@@ -2,7 +2,6 @@ from marker.processors import BaseProcessor
 from marker.schema import BlockTypes
 from marker.schema.document import Document
 import pypdfium2 as pdfium
-import fitz
 import numpy as np
 # from bs4 import BeautifulSoup
 import re
@@ -131,9 +130,12 @@ class DocumentTOCProcessor(BaseProcessor):
             for child in outline_item.children:
                 self.walk_outline(child, toc_info, level)
 
-    def get_document_toc(self, path):
-        pdf = pdfium.PdfDocument("./PDFs/ISO_IEC_22237-1_2021(en) (1).pdf")
-        toc = pdf.get_toc()
+    def get_document_toc(self, path: str | bytes, session=None):
+        if session is not None:
+            toc = session.get_toc()
+        else:
+            pdf = pdfium.PdfDocument(path)
+            toc = pdf.get_toc()
 
         toc_info = []
         if toc:
@@ -169,7 +171,15 @@ class DocumentTOCProcessor(BaseProcessor):
                         out.append(block.id)
                 return out
 
-        doc = fitz.open(document.filepath)
+        if document.session is not None:
+            doc = document.session.get_fitz_doc()
+        else:
+            import fitz
+
+            if document.file_bytes is not None:
+                doc = fitz.open(stream=document.file_bytes, filetype="pdf")
+            else:
+                doc = fitz.open(document.filepath)
 
         for info in toc_info:
             title = info['title']
@@ -251,14 +261,18 @@ class DocumentTOCProcessor(BaseProcessor):
 
     def __call__(self, document: Document):
         document.verify_headers()
-        toc_info = self.get_document_toc(document.filepath)
+        toc_info = self.get_document_toc(document.source, document.session)
         toc_flag = False
         if toc_info:
             self.merge_document_toc(document, toc_info)
             toc_flag = True
 
         toc = []
-        parent_level = 0
+        # Picks up the level where the previous window of pages left off
+        parent_levels = document.carry_state.setdefault("toc_parent_level", {})
+        first_page_id = document.pages[0].page_id if document.pages else 0
+        earlier = [page_id for page_id in parent_levels if page_id < first_page_id]
+        parent_level = parent_levels[max(earlier)] if earlier else 0
         for page in document.pages:
             for block in page.contained_blocks(document, self.block_types):
                 if toc_flag:
@@ -278,4 +292,5 @@ class DocumentTOCProcessor(BaseProcessor):
                     "doc_toc_level": block.doc_toc_level,
                     'line width': block.line_height(document)
                 })
+            parent_levels[page.page_id] = parent_level
         document.table_of_contents = toc
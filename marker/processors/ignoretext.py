@@ -1,7 +1,7 @@
 import re
 from collections import Counter
 from itertools import groupby
-from typing import Annotated, List
+from typing import Annotated, Dict, List, Optional
 
 from rapidfuzz import fuzz
 
@@ -59,8 +59,8 @@ class IgnoreTextProcessor(BaseProcessor):
             if last_block is not None:
                 last_blocks.append(last_block)
 
-        self.filter_common_elements(document, first_blocks)
-        self.filter_common_elements(document, last_blocks)
+        self.filter_common_elements(document, first_blocks, document.carry_state.setdefault("ignoretext_first", {}))
+        self.filter_common_elements(document, last_blocks, document.carry_state.setdefault("ignoretext_last", {}))
 
     @staticmethod
     def clean_text(text):
@@ -69,21 +69,27 @@ class IgnoreTextProcessor(BaseProcessor):
         text = re.sub(r"\s*\d+$", "", text)  # remove numbers at the end of the line
         return text
 
-    def filter_common_elements(self, document, blocks: List[Block]):
+    def filter_common_elements(self, document, blocks: List[Block], history: Optional[Dict[int, str]] = None):
+        text = [self.clean_text(b.raw_text(document)) for b in blocks]
+        if history is not None:
+            # Blocks from earlier windows count towards what is common, one per page
+            history.update((b.page_id, t) for b, t in zip(blocks, text))
+            all_text = [history[page_id] for page_id in sorted(history)]
+        else:
+            all_text = text
+
         # We can't filter if we don't have enough pages to find common elements
-        if len(blocks) < self.common_element_min_blocks:
+        if len(all_text) < self.common_element_min_blocks:
             return
 
-        text = [self.clean_text(b.raw_text(document)) for b in blocks]
-
         streaks = {}
-        for key, group in groupby(text):
+        for key, group in groupby(all_text):
             streaks[key] = max(streaks.get(key, 0), len(list(group)))
 
-        counter = Counter(text)
+        counter = Counter(all_text)
         common = [
             k for k, v in counter.items()
-            if (v >= len(blocks) * self.common_element_threshold or streaks[k] >= self.max_streak)
+            if (v >= len(all_text) * self.common_element_threshold or streaks[k] >= self.max_streak)
             and v > self.common_element_min_blocks
         ]
         if len(common) == 0:
@@ -133,14 +133,14 @@ No corrections needed.
         row_shift = 0
         block_image = self.extract_image(document, block)
         block_rescaled_bbox = block.polygon.rescale(
-            page.polygon.size, page.get_image(highres=True).size
+            page.polygon.size, page.get_image_size(highres=True)
         ).bbox
         for i in range(0, row_count, self.max_rows_per_batch):
             batch_row_idxs = row_idxs[i : i + self.max_rows_per_batch]
             batch_cells = [cell for cell in children if cell.row_id in batch_row_idxs]
             batch_cell_bboxes = [
                 cell.polygon.rescale(
-                    page.polygon.size, page.get_image(highres=True).size
+                    page.polygon.size, page.get_image_size(highres=True)
                 ).bbox
                 for cell in batch_cells
             ]
@@ -2,16 +2,11 @@ import warnings
 from typing import Annotated, Dict, List
 
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.exceptions import ConvergenceWarning
 
 from marker.processors import BaseProcessor
 from marker.schema import BlockTypes
 from marker.schema.document import Document
 
-# Ignore sklearn warning about not converging
-warnings.filterwarnings("ignore", category=ConvergenceWarning)
-
 
 class SectionHeaderProcessor(BaseProcessor):
     """
@@ -48,7 +43,13 @@ class SectionHeaderProcessor(BaseProcessor):
                     line_heights[block.id] = 0
                     block.ignore_for_output = True  # Don't output an empty section header
 
-        flat_line_heights = list(line_heights.values())
+        # Heights of earlier windows keep heading levels consistent across a windowed conversion
+        history = document.carry_state.setdefault("section_header_heights", {})
+        for page in document.pages:
+            history[page.page_id] = [
+                line_heights[block.id] for block in page.children if block.id in line_heights
+            ]
+        flat_line_heights = [height for page_id in sorted(history) for height in history[page_id]]
         heading_ranges = self.bucket_headings(flat_line_heights)
 
         for page in document.pages:
@@ -70,8 +71,14 @@ class SectionHeaderProcessor(BaseProcessor):
         if len(line_heights) <= self.level_count:
             return []
 
+        from sklearn.cluster import KMeans
+        from sklearn.exceptions import ConvergenceWarning
+
         data = np.asarray(line_heights).reshape(-1, 1)
-        labels = KMeans(n_clusters=num_levels, random_state=0, n_init="auto").fit_predict(data)
+        with warnings.catch_warnings():
+            # Ignore sklearn warning about not converging
+            warnings.filterwarnings("ignore", category=ConvergenceWarning)
+            labels = KMeans(n_clusters=num_levels, random_state=0, n_init="auto").fit_predict(data)
         data_labels = np.concatenate([data, labels.reshape(-1, 1)], axis=1)
         data_labels = np.sort(data_labels, axis=0)
 
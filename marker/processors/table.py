@@ -1,7 +1,7 @@
 import re
 from collections import defaultdict
 from copy import deepcopy
-from typing import Annotated, List
+from typing import Annotated, Dict, List, Optional
 from collections import Counter
 from PIL import Image
 
@@ -12,6 +12,8 @@ from surya.table_rec.schema import TableResult, TableCell as SuryaTableCell
 from pdftext.extraction import table_output
 
 from marker.processors import BaseProcessor
+from marker.providers.char_index import PageCharIndex
+from marker.providers.pdftext_pool import extract_pages, pool_supported
 from marker.schema import BlockTypes
 from marker.schema.blocks.tablecell import TableCell
 from marker.schema.document import Document
@@ -52,6 +54,10 @@ class TableProcessor(BaseProcessor):
         int,
         "The number of workers to use for pdftext.",
     ] = 1
+    pdftext_pool: Annotated[
+        bool,
+        "Extract text on a pdftext worker pool kept across documents, instead of starting a pool per document.",
+    ] = settings.PDFTEXT_POOL
     disable_tqdm: Annotated[
         bool,
         "Whether to disable the tqdm progress bar.",
@@ -72,7 +78,7 @@ class TableProcessor(BaseProcessor):
         self.table_rec_model = table_rec_model
 
     def __call__(self, document: Document):
-        filepath = document.filepath  # Path to original pdf file
+        filepath = document.source  # Path to (or bytes of) the original pdf file
 
         table_data = []
         # Extract details from documents
@@ -83,7 +89,7 @@ class TableProcessor(BaseProcessor):
                 image = block.get_image(document, highres=True)
                 image_poly = block.polygon.rescale(
                     (page.polygon.width, page.polygon.height),
-                    page.get_image(highres=True).size,
+                    page.get_image_size(highres=True),
                 )
 
                 table_data.append(
@@ -92,7 +98,7 @@ class TableProcessor(BaseProcessor):
                         "page_id": page.page_id,
                         "table_image": image,
                         "table_bbox": image_poly.bbox,
-                        "img_size": page.get_image(highres=True).size,
+                        "img_size": page.get_image_size(highres=True),
                         "ocr_block": any(
                             [
                                 page.text_extraction_method in ["surya"],
@@ -112,8 +118,9 @@ class TableProcessor(BaseProcessor):
         # Assign cell text if we don't need OCR
         # We do this at a line level
         extract_blocks = [t for t in table_data if not t["ocr_block"]]
+        char_index = document.session.char_index if document.session is not None else None
         self.assign_pdftext_lines(
-            extract_blocks, filepath
+            extract_blocks, filepath, char_index
         )  # Handle tables where good text exists in the PDF
         self.assign_text_to_cells(tables, table_data)
 
@@ -134,7 +141,7 @@ class TableProcessor(BaseProcessor):
                 for cell in cells:
                     # Rescale the cell polygon to the page size
                     cell_polygon = PolygonBox(polygon=cell.polygon).rescale(
-                        page.get_image(highres=True).size, page.polygon.size
+                        page.get_image_size(highres=True), page.polygon.size
                     )
 
                     # Rescale cell polygon to be relative to the page instead of the table
@@ -445,7 +452,7 @@ class TableProcessor(BaseProcessor):
                 assert all("bbox" in t for t in text), "All text lines must have a bbox"
                 table_cells[k].text_lines = text
 
-    def assign_pdftext_lines(self, extract_blocks: list, filepath: str):
+    def assign_pdftext_lines(self, extract_blocks: list, filepath: str | bytes, char_index: Optional[Dict[int, PageCharIndex]] = None):
         table_inputs = []
         unique_pages = list(set([t["page_id"] for t in extract_blocks]))
         if len(unique_pages) == 0:
@@ -460,12 +467,30 @@ class TableProcessor(BaseProcessor):
                     img_size = block["img_size"]
 
             table_inputs.append({"tables": tables, "img_size": img_size})
-        cell_text = table_output(
-            filepath,
-            table_inputs,
-            page_range=unique_pages,
-            workers=self.pdftext_workers,
-        )
+
+        # Pages the provider indexed are looked up directly, only the rest go through pdftext again
+        char_index = char_index or {}
+        cell_text = [
+            char_index[page].table_text(table_input["tables"], table_input["img_size"])
+            if page in char_index else None
+            for page, table_input in zip(unique_pages, table_inputs)
+        ]
+        missing = [i for i, page_text in enumerate(cell_text) if page_text is None]
+        if missing:
+            missing_pages = [unique_pages[i] for i in missing]
+            pages = None
+            if self.pdftext_pool and pool_supported():
+                # Extracted on the shared pdftext pool, with table_output's defaults
+                pages = extract_pages(filepath, missing_pages, self.pdftext_workers, keep_chars=True)
+            missing_text = table_output(
+                filepath,
+                [table_inputs[i] for i in missing],
+                page_range=missing_pages,
+                workers=self.pdftext_workers,
+                pages=pages,
+            )
+            for i, page_text in zip(missing, missing_text):
+                cell_text[i] = page_text
         assert len(cell_text) == len(unique_pages), (
             "Number of pages and table inputs must match"
         )
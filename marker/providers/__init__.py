@@ -59,6 +59,13 @@ class BaseProvider:
     def get_images(self, idxs: List[int], dpi: int) -> List[Image.Image]:
         pass
 
+    def get_page_images(self, idxs: List[int], dpis: List[int]) -> List[Dict[int, Image.Image]]:
+        """
+        Images of each page at several resolutions, keyed by dpi.
+        """
+        by_dpi = {dpi: self.get_images(idxs, dpi) for dpi in set(dpis)}
+        return [{dpi: images[i] for dpi, images in by_dpi.items()} for i in range(len(idxs))]
+
     def get_page_bbox(self, idx: int) -> PolygonBox | None:
         pass
 
@@ -68,6 +75,15 @@ class BaseProvider:
     def get_page_refs(self, idx: int) -> List[Reference]:
         pass
 
+    def release_pages(self, idxs: List[int]):
+        # Text lines of pages that are finished aren't needed again
+        for idx in idxs:
+            self.page_lines.pop(idx, None)
+
+    def close(self):
+        # Releases anything held open for the conversion
+        pass
+
     def __enter__(self):
         return self
 
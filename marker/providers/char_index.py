@@ -0,0 +1,181 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+from pdftext.postprocessing import sort_blocks
+
+# Pairs of neighbouring characters needed before the gap between them is trusted
+MIN_GAP_SAMPLES = 100
+
+
+def _char_gaps(chars: List[dict], rotation: int) -> List[float]:
+    # Same measure pdftext's table extraction uses, along the axis set by the rotation
+    gaps = []
+    for char1, char2 in zip(chars, chars[1:]):
+        bbox1, bbox2 = char1["bbox"], char2["bbox"]
+        if rotation == 90:
+            gaps.append(bbox2[0] - bbox1[2])
+        elif rotation == 180:
+            gaps.append(bbox2[1] - bbox1[3])
+        elif rotation == 270:
+            gaps.append(bbox1[0] - bbox2[2])
+        else:
+            gaps.append(bbox1[1] - bbox2[3])
+    return gaps
+
+
+def _same_span(bbox, curr_box, img_size, space_thresh, rotation) -> bool:
+    def close(a, b, dimension, mult=1, use_abs=True):
+        diff = abs(a - b) if use_abs else a - b
+        return diff / img_size[dimension] < space_thresh * mult
+
+    if rotation == 90:
+        return close(bbox[0], curr_box[0], 0, use_abs=False) and close(bbox[1], curr_box[3], 1) \
+            and close(bbox[0], curr_box[0], 0, mult=5)
+    elif rotation == 180:
+        return close(bbox[2], curr_box[0], 0, use_abs=False) and close(bbox[1], curr_box[1], 1) \
+            and close(bbox[2], curr_box[0], 1, mult=5)
+    elif rotation == 270:
+        return close(bbox[0], curr_box[0], 0, use_abs=False) and close(bbox[3], curr_box[1], 1) \
+            and close(bbox[0], curr_box[0], 1, mult=5)
+    return close(bbox[0], curr_box[2], 0, use_abs=False) and close(bbox[1], curr_box[1], 1) \
+        and close(bbox[0], curr_box[2], 1, mult=5)
+
+
+class PageCharIndex:
+    """
+    The characters pdftext extracted from one page, packed into arrays: one bbox per
+    character, the character range of every line, and offsets into a single string
+    for their text.  This is what table cell text is assigned from, so tables don't
+    need a second pdftext pass over the PDF.  Coordinates are in PDF points.
+
+    The characters come from the provider's extraction, with its `flatten_pdf` setting
+    and tight boxes around quotes, while `table_output` extracts unflattened pages
+    with loose quote boxes.  Cell text can differ where those settings matter;
+    `scripts/compare_table_text.py` reports how often it does.
+    """
+
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        rotation: int,
+        text: str,
+        offsets: np.ndarray,
+        bboxes: np.ndarray,
+        line_starts: np.ndarray,
+        line_bboxes: np.ndarray,
+        gap_percentile: float | None,
+    ):
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+        self.text = text
+        self.offsets = offsets
+        self.bboxes = bboxes
+        self.line_starts = line_starts
+        self.line_bboxes = line_bboxes
+        self.gap_percentile = gap_percentile
+
+    @classmethod
+    def from_page(cls, page: dict) -> "PageCharIndex":
+        """
+        Builds the index from a page of pdftext's `dictionary_output`, which must have
+        been extracted with `keep_chars`.
+        """
+        rotation = page.get("rotation", 0)
+        texts, bboxes, line_starts, line_bboxes, gaps = [], [], [0], [], []
+        for block in page["blocks"]:
+            for line in block["lines"]:
+                line_bboxes.append(line["bbox"])
+                for span in line["spans"]:
+                    chars = span.get("chars") or []
+                    gaps.extend(_char_gaps(chars, rotation))
+                    for char in chars:
+                        texts.append(char["char"])
+                        bboxes.append(char["bbox"])
+                line_starts.append(len(texts))
+
+        offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(t) for t in texts])
+        return cls(
+            width=page["width"],
+            height=page["height"],
+            rotation=rotation,
+            text="".join(texts),
+            offsets=offsets,
+            bboxes=np.asarray(bboxes, dtype=np.float32).reshape(-1, 4),
+            line_starts=np.asarray(line_starts, dtype=np.int32),
+            line_bboxes=np.asarray(line_bboxes, dtype=np.float32).reshape(-1, 4),
+            gap_percentile=float(np.percentile(gaps, 80)) if len(gaps) > MIN_GAP_SAMPLES else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.bboxes)
+
+    def table_text(
+        self,
+        tables: Sequence[Sequence[float]],
+        img_size: Sequence[int],
+        table_thresh: float = 0.8,
+        space_thresh: float = 0.01,
+    ) -> List[List[Dict]]:
+        """
+        Text runs inside each table, grouped the way pdftext's `table_output` groups
+        them.  `tables` are bboxes in the coordinates of an image of `img_size`.  Lines
+        mostly inside a table are split into runs at gaps between characters.  Run
+        bboxes are relative to the table's top left corner.
+        """
+        if self.gap_percentile is not None:
+            # The typical gap between characters, against the image size like pdftext does
+            gap_dim = 0 if self.rotation in (90, 270) else 1
+            space_thresh = max(space_thresh, self.gap_percentile / img_size[gap_dim])
+
+        scale = np.array(
+            [img_size[0] / self.width, img_size[1] / self.height] * 2, dtype=np.float32
+        )
+        char_bboxes = self.bboxes * scale
+        line_bboxes = self.line_bboxes * scale
+        line_areas = (line_bboxes[:, 2] - line_bboxes[:, 0]) * (line_bboxes[:, 3] - line_bboxes[:, 1])
+
+        table_texts = []
+        for table in tables:
+            x0, y0, x1, y1 = table
+            overlap_x = np.minimum(line_bboxes[:, 2], x1) - np.maximum(line_bboxes[:, 0], x0)
+            overlap_y = np.minimum(line_bboxes[:, 3], y1) - np.maximum(line_bboxes[:, 1], y0)
+            overlap = np.clip(overlap_x, 0, None) * np.clip(overlap_y, 0, None)
+            overlap_pct = np.divide(
+                overlap, line_areas, out=np.zeros_like(overlap), where=line_areas > 0
+            )
+
+            table_text = []
+            for line_idx in np.nonzero(overlap_pct >= table_thresh)[0]:
+                start, end = int(self.line_starts[line_idx]), int(self.line_starts[line_idx + 1])
+                # Runs grow one character at a time, so this part stays a loop
+                run_start, curr_box = None, None
+                for char_idx, bbox in enumerate(char_bboxes[start:end].tolist(), start):
+                    if run_start is not None and _same_span(bbox, curr_box, img_size, space_thresh, self.rotation):
+                        curr_box = [
+                            min(curr_box[0], bbox[0]), min(curr_box[1], bbox[1]),
+                            max(curr_box[2], bbox[2]), max(curr_box[3], bbox[3]),
+                        ]
+                        continue
+                    if run_start is not None:
+                        self._add_run(table_text, run_start, char_idx, curr_box)
+                    run_start, curr_box = char_idx, bbox
+                if run_start is not None:
+                    self._add_run(table_text, run_start, end, curr_box)
+
+            for item in table_text:
+                item["bbox"] = [
+                    item["bbox"][0] - x0,
+                    item["bbox"][1] - y0,
+                    item["bbox"][2] - x0,
+                    item["bbox"][3] - y0,
+                ]
+            table_texts.append(sort_blocks(table_text))
+        return table_texts
+
+    def _add_run(self, table_text: List[Dict], start: int, end: int, bbox: List[float]):
+        text = self.text[self.offsets[start]:self.offsets[end]]
+        if text.strip():
+            table_text.append({"text": text, "bbox": bbox})
@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+from marker.providers import BaseProvider
+
+
+def image_nbytes(image: Image.Image) -> int:
+    return image.size[0] * image.size[1] * len(image.getbands())
+
+
+class PageImageCache:
+    """
+    Renders page images through the provider when they are first asked for and keeps
+    the most recently used ones, up to `max_bytes`.  Evicted pages are rendered again
+    if they are needed later.  High resolution images are only rendered for pages
+    that ask for them, like pages that are OCRed or hold tables or equations.
+    """
+
+    def __init__(self, provider: BaseProvider, lowres_dpi: int, highres_dpi: int, max_bytes: int):
+        self.provider = provider
+        self.lowres_dpi = lowres_dpi
+        self.highres_dpi = highres_dpi
+        self.max_bytes = max_bytes
+        self.renders = 0
+        self.hits = 0
+        self._images: OrderedDict[Tuple[int, bool], Image.Image] = OrderedDict()
+        self._sizes: Dict[Tuple[int, bool], Tuple[int, int]] = {}  # Kept after eviction
+        self._total = 0
+        # Renders are serialized, pdfium is not thread safe
+        self._lock = threading.RLock()
+
+    def _dpi(self, highres: bool) -> int:
+        return self.highres_dpi if highres else self.lowres_dpi
+
+    def _put(self, key: Tuple[int, bool], image: Image.Image) -> Image.Image:
+        size = self._sizes.setdefault(key, image.size)
+        if image.size != size:
+            # A page rendered again after eviction, possibly downsampled instead of rendered
+            # directly, keeps the size its bboxes were already scaled with
+            image = image.resize(size, Image.Resampling.BOX)
+        self._images[key] = image
+        self._total += image_nbytes(image)
+        while self._total > self.max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self._total -= image_nbytes(evicted)
+        return image
+
+    def get(self, page_id: int, highres: bool = False) -> Image.Image:
+        key = (page_id, highres)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+
+            self.renders += 1
+            if highres and (page_id, False) not in self._images:
+                # The low resolution image comes almost for free from the high one
+                images = self.provider.get_page_images([page_id], [self.lowres_dpi, self.highres_dpi])[0]
+                self._put((page_id, False), images[self.lowres_dpi])
+                image = images[self.highres_dpi]
+            else:
+                image = self.provider.get_images([page_id], self._dpi(highres))[0]
+            return self._put(key, image)
+
+    def prefetch(self, page_ids: List[int], highres: bool = False):
+        """
+        Renders the pages that aren't cached yet in one provider call, so the provider
+        can spread them over its raster workers.  Only as many pages as fit in
+        `max_bytes` are rendered, so none of them are evicted before they are used.
+        """
+        with self._lock:
+            missing = [p for p in dict.fromkeys(page_ids) if (p, highres) not in self._images]
+            if len(missing) < 2:
+                return
+
+            # The first page tells how many of the rest fit
+            first = self.get(missing[0], highres)
+            fits = max(0, self.max_bytes - self._total) // max(1, image_nbytes(first))
+            missing = missing[1:1 + fits]
+            if not missing:
+                return
+
+            self.renders += len(missing)
+            images = self.provider.get_images(missing, self._dpi(highres))
+            for page_id, image in zip(missing, images):
+                self._put((page_id, highres), image)
+
+    def size(self, page_id: int, highres: bool = False) -> Tuple[int, int]:
+        """
+        Pixel size of a page image.  Sizes are recorded when a page is rendered and
+        kept after its image is evicted; a size never seen is rendered for, since the
+        size at another resolution doesn't tell it to the pixel.
+        """
+        with self._lock:
+            size = self._sizes.get((page_id, highres))
+            if size is not None:
+                return size
+
+        return self.get(page_id, highres).size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "renders": self.renders,
+                "hits": self.hits,
+                "cached_images": len(self._images),
+                "cached_bytes": self._total,
+            }
@@ -1,26 +1,29 @@
 import contextlib
 import ctypes
 import logging
-import re
 from typing import Annotated, Dict, List, Optional, Set
 
-import pypdfium2 as pdfium
 import pypdfium2.raw as pdfium_c
 from ftfy import fix_text
 from pdftext.extraction import dictionary_output
 from pdftext.schema import Reference
-from pdftext.pdf.utils import flatten as flatten_pdf_page
 
 from PIL import Image
 from pypdfium2 import PdfiumError, PdfDocument
 
 from marker.providers import BaseProvider, ProviderOutput, Char, ProviderPageLines
-from marker.providers.utils import alphanum_ratio
+from marker.providers.char_index import PageCharIndex
+from marker.providers.pdftext_pool import extract_pages, pool_supported
+from marker.providers.pools import can_start_workers
+from marker.providers.raster_pool import render_pages_parallel
+from marker.providers.session import DocumentSession
+from marker.providers.utils import TextQuality
 from marker.schema import BlockTypes
 from marker.schema.polygon import PolygonBox
 from marker.schema.registry import get_block_class
 from marker.schema.text.line import Line
 from marker.schema.text.span import Span
+from marker.settings import settings
 
 # Ignore pypdfium2 warning about form flattening
 logging.getLogger("pypdfium2").setLevel(logging.ERROR)
@@ -40,6 +43,14 @@ class PdfProvider(BaseProvider):
         int,
         "The number of workers to use for pdftext.",
     ] = 4
+    pdftext_pool: Annotated[
+        bool,
+        "Extract text on a pdftext worker pool kept across documents, instead of starting a pool per document.",
+    ] = settings.PDFTEXT_POOL
+    pdftext_pages_per_worker: Annotated[
+        int,
+        "The minimum number of pages per pdftext worker.  Smaller documents are extracted whole on one worker.",
+    ] = 10
     flatten_pdf: Annotated[
         bool,
         "Whether to flatten the PDF structure.",
@@ -80,11 +91,32 @@ class PdfProvider(BaseProvider):
         bool,
         "Whether to keep character-level information in the output.",
     ] = False
+    single_pass_render: Annotated[
+        bool,
+        "Render each page once at the highest requested DPI and downsample it for the lower ones.",
+    ] = True
+    char_index: Annotated[
+        bool,
+        "Keep a compact per-page index of the extracted characters, so table cell text is assigned without re-running pdftext.",
+        "Characters are then extracted for every page, which raises peak memory during extraction",
+        "(pdftext keeps a dict per character) and keeps about 25 bytes per character for the rest of the conversion.",
+        "Cell text follows this provider's extraction settings, so it can differ slightly from pdftext's table_output.",
+    ] = False
+    raster_workers: Annotated[
+        int,
+        "The number of processes to render page images with.  The pool is reused across documents.",
+    ] = settings.RASTER_WORKERS
+    raster_parallel_min_pages: Annotated[
+        int,
+        "The minimum number of pages in one render call before it is split across the raster workers.",
+    ] = 8
 
-    def __init__(self, filepath: str, config=None):
+    def __init__(self, filepath: str | bytes, config=None):
+        # filepath may also hold the raw PDF bytes, which pdfium and pdftext open directly
         super().__init__(filepath, config)
 
         self.filepath = filepath
+        self.session = DocumentSession(filepath, self.flatten_pdf)
 
         with self.get_doc() as doc:
             self.page_count = len(doc)
@@ -108,18 +140,17 @@ class PdfProvider(BaseProvider):
 
     @contextlib.contextmanager
     def get_doc(self):
-        doc = None
-        try:
-            doc = pdfium.PdfDocument(self.filepath)
+        # Borrows the session's handle, the PDF is parsed once per conversion
+        with self.session.borrow() as doc:
+            yield doc
 
-            # Must be called on the parent pdf, before retrieving pages to render correctly
-            if self.flatten_pdf:
-                doc.init_forms()
+    def release_pages(self, idxs: List[int]):
+        super().release_pages(idxs)
+        for idx in idxs:
+            self.session.char_index.pop(idx, None)
 
-            yield doc
-        finally:
-            if doc:
-                doc.close()
+    def close(self):
+        self.session.close()
 
     def __len__(self) -> int:
         return self.page_count
@@ -201,15 +232,27 @@ class PdfProvider(BaseProvider):
 
     def pdftext_extraction(self, doc: PdfDocument) -> ProviderPageLines:
         page_lines: ProviderPageLines = {}
-        page_char_blocks = dictionary_output(
-            self.filepath,
-            page_range=self.page_range,
-            keep_chars=self.keep_chars,
-            workers=self.pdftext_workers,
-            flatten_pdf=self.flatten_pdf,
-            quote_loosebox=False,
-            disable_links=self.disable_links,
-        )
+        if self.pdftext_pool and pool_supported():
+            page_char_blocks = extract_pages(
+                self.filepath,
+                page_range=self.page_range,
+                workers=self.pdftext_workers,
+                pages_per_worker=self.pdftext_pages_per_worker,
+                keep_chars=self.keep_chars or self.char_index,
+                flatten_pdf=self.flatten_pdf,
+                quote_loosebox=False,
+                disable_links=self.disable_links,
+            )
+        else:
+            page_char_blocks = dictionary_output(
+                self.filepath,
+                page_range=self.page_range,
+                keep_chars=self.keep_chars or self.char_index,
+                workers=self.pdftext_workers,
+                flatten_pdf=self.flatten_pdf,
+                quote_loosebox=False,
+                disable_links=self.disable_links,
+            )
         self.page_bboxes = {
             i: [0, 0, page["width"], page["height"]]
             for i, page in zip(self.page_range, page_char_blocks)
@@ -225,6 +268,9 @@ class PdfProvider(BaseProvider):
             if not self.check_page(page_id, doc):
                 continue
 
+            if self.char_index:
+                self.session.char_index[page_id] = PageCharIndex.from_page(page)
+
             for block in page["blocks"]:
                 for line in block["lines"]:
                     spans: List[Span] = []
@@ -308,10 +354,7 @@ class PdfProvider(BaseProvider):
         if len(page_spans) == 0:
             return False
 
-        text = ""
-        for span in page_spans:
-            text = text + " " + span.text
-            text = text + "\n"
+        text = "".join(f" {span.text}\n" for span in page_spans)
         if len(text.strip()) == 0:
             return False
         if self.detect_bad_ocr(text):
@@ -376,49 +419,67 @@ class PdfProvider(BaseProvider):
 
         return True
 
-    def detect_bad_ocr(self, text):
-        if len(text) == 0:
-            # Assume OCR failed if we have no text
-            return True
-
-        spaces = len(re.findall(r"\s+", text))
-        alpha_chars = len(re.sub(r"\s+", "", text))
-        if spaces / (alpha_chars + spaces) > self.ocr_space_threshold:
-            return True
-
-        newlines = len(re.findall(r"\n+", text))
-        non_newlines = len(re.sub(r"\n+", "", text))
-        if newlines / (newlines + non_newlines) > self.ocr_newline_threshold:
-            return True
-
-        if alphanum_ratio(text) < self.ocr_alphanum_threshold:  # Garbled text
-            return True
+    def text_quality(self, text: str) -> TextQuality:
+        return TextQuality.from_text(text, self.ocr_invalid_chars)
 
-        invalid_chars = len([c for c in text if c in self.ocr_invalid_chars])
-        if invalid_chars > max(6.0, len(text) * 0.03):
-            return True
+    def is_bad_text(self, quality: TextQuality) -> bool:
+        return quality.is_bad(
+            self.ocr_space_threshold,
+            self.ocr_newline_threshold,
+            self.ocr_alphanum_threshold,
+        )
 
-        return False
+    def detect_bad_ocr(self, text):
+        return self.is_bad_text(self.text_quality(text))
 
-    @staticmethod
-    def _render_image(
-        pdf: pdfium.PdfDocument, idx: int, dpi: int, flatten_page: bool
-    ) -> Image.Image:
-        page = pdf[idx]
-        if flatten_page:
-            flatten_pdf_page(page)
-            page = pdf[idx]
+    def _render_image(self, idx: int, dpi: int) -> Image.Image:
+        page = self.session.get_page(idx, flatten=self.flatten_pdf)
         image = page.render(scale=dpi / 72, draw_annots=False).to_pil()
         image = image.convert("RGB")
         return image
 
+    def _render_images(self, doc: PdfDocument, idxs: List[int], dpi: int) -> List[Image.Image]:
+        if (
+            self.raster_workers > 1
+            and len(idxs) >= self.raster_parallel_min_pages
+            and can_start_workers()
+        ):
+            return render_pages_parallel(
+                doc, self.filepath, idxs, dpi, self.flatten_pdf, self.raster_workers
+            )
+        return [self._render_image(idx, dpi) for idx in idxs]
+
     def get_images(self, idxs: List[int], dpi: int) -> List[Image.Image]:
         with self.get_doc() as doc:
-            images = [
-                self._render_image(doc, idx, dpi, self.flatten_pdf) for idx in idxs
-            ]
+            images = self._render_images(doc, idxs, dpi)
         return images
 
+    @staticmethod
+    def _downsample(image: Image.Image, from_dpi: int, to_dpi: int) -> Image.Image:
+        if from_dpi % to_dpi == 0:
+            # Integer factors, like 192 -> 96, average whole pixel blocks
+            return image.reduce(from_dpi // to_dpi)
+        size = (
+            max(1, round(image.width * to_dpi / from_dpi)),
+            max(1, round(image.height * to_dpi / from_dpi)),
+        )
+        return image.resize(size, Image.Resampling.BOX)
+
+    def get_page_images(self, idxs: List[int], dpis: List[int]) -> List[Dict[int, Image.Image]]:
+        if not self.single_pass_render:
+            return super().get_page_images(idxs, dpis)
+
+        # One page load, flatten and render per page; lower resolutions are downsampled
+        max_dpi = max(dpis)
+        page_images = []
+        with self.get_doc() as doc:
+            for image in self._render_images(doc, idxs, max_dpi):
+                page_images.append({
+                    dpi: image if dpi == max_dpi else self._downsample(image, max_dpi, dpi)
+                    for dpi in set(dpis)
+                })
+        return page_images
+
     def get_page_bbox(self, idx: int) -> PolygonBox | None:
         bbox = self.page_bboxes.get(idx)
         if bbox:
@@ -0,0 +1,132 @@
+import math
+from functools import lru_cache
+from importlib import metadata
+from typing import List, Sequence
+
+import pypdfium2 as pdfium
+from pdftext.pdf.links import add_links_and_refs
+from pdftext.pdf.pages import get_pages
+from pdftext.postprocessing import handle_hyphens, postprocess_text
+from pdftext.schema import Pages
+
+from marker.logger import get_logger
+from marker.providers.pools import WorkerSource, can_start_workers, get_pool, load_source, release_source, share_source
+
+logger = get_logger()
+
+# _extract_range and _finish_pages mirror dictionary_output's internals from this release
+PDFTEXT_VERSION = "0.6.3"
+
+
+@lru_cache
+def pool_supported() -> bool:
+    """
+    Whether the installed pdftext is the release this module mirrors.  Any other one
+    may extract differently, so callers go through `dictionary_output` instead.
+    """
+    try:
+        version = metadata.version("pdftext")
+    except metadata.PackageNotFoundError:
+        version = None
+    if version != PDFTEXT_VERSION:
+        logger.warning(
+            f"pdftext {version} is installed, the pdftext pool expects {PDFTEXT_VERSION}; "
+            "extracting with dictionary_output instead"
+        )
+        return False
+    return True
+
+
+def _extract_range(
+    source: WorkerSource, page_range: List[int], flatten_pdf: bool, quote_loosebox: bool
+) -> Pages:
+    # Runs in a pool worker, or inline when workers can't be started
+    doc = pdfium.PdfDocument(load_source(source))
+    try:
+        # Must be called on the parent pdf, before the page was retrieved
+        if flatten_pdf:
+            doc.init_forms()
+        return get_pages(doc, page_range, flatten_pdf, quote_loosebox)
+    finally:
+        doc.close()
+
+
+def plan_chunks(page_range: Sequence[int], workers: int, pages_per_worker: int) -> List[List[int]]:
+    """
+    Contiguous page ranges, one per task.  A document only gets another worker for
+    every `pages_per_worker` pages, so small documents stay whole on a single worker.
+    """
+    page_range = list(page_range)
+    chunks = max(1, min(workers, len(page_range) // max(1, pages_per_worker)))
+    chunk_size = max(1, math.ceil(len(page_range) / chunks))
+    return [page_range[i:i + chunk_size] for i in range(0, len(page_range), chunk_size)]
+
+
+def _finish_pages(pages: Pages, keep_chars: bool) -> Pages:
+    # The cleanup pdftext's dictionary_output does once links are merged
+    for page in pages:
+        for block in page["blocks"]:
+            for k in list(block.keys()):
+                if k not in ["lines", "bbox"]:
+                    del block[k]
+            block["bbox"] = block["bbox"].bbox
+            for line in block["lines"]:
+                for k in list(line.keys()):
+                    if k not in ["spans", "bbox"]:
+                        del line[k]
+                line["bbox"] = line["bbox"].bbox
+                for span in line["spans"]:
+                    span["bbox"] = span["bbox"].bbox
+                    span["text"] = handle_hyphens(postprocess_text(span["text"]), keep_hyphens=True)
+                    if not keep_chars:
+                        del span["chars"]
+                    else:
+                        for char in span["chars"]:
+                            char["bbox"] = char["bbox"].bbox
+
+        if page["rotation"] == 90 or page["rotation"] == 270:
+            page["width"], page["height"] = page["height"], page["width"]
+            page["bbox"] = [page["bbox"][2], page["bbox"][3], page["bbox"][0], page["bbox"][1]]
+    return pages
+
+
+def extract_pages(
+    source: str | bytes,
+    page_range: Sequence[int],
+    workers: int,
+    pages_per_worker: int = 10,
+    keep_chars: bool = False,
+    flatten_pdf: bool = False,
+    quote_loosebox: bool = True,
+    disable_links: bool = False,
+) -> Pages:
+    """
+    The same output as pdftext's `dictionary_output`, with the page extraction run on
+    a process pool that is kept across documents, instead of a pool started and torn
+    down for every document.  Large documents are split across the workers, small ones
+    go to one worker whole.  Links are merged here, over all the pages at once, so
+    references between pages in different chunks still resolve.
+    """
+    chunks = plan_chunks(page_range, workers, pages_per_worker)
+    if workers > 1 and can_start_workers():
+        worker_source, buffer = share_source(source)
+        try:
+            pool = get_pool("pdftext", workers)
+            futures = [
+                pool.submit(_extract_range, worker_source, chunk, flatten_pdf, quote_loosebox)
+                for chunk in chunks
+            ]
+            pages = [page for future in futures for page in future.result()]
+        finally:
+            release_source(buffer)
+    else:
+        pages = _extract_range(source, list(page_range), flatten_pdf, quote_loosebox)
+
+    if not disable_links:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            add_links_and_refs(pages, pdf)
+        finally:
+            pdf.close()
+
+    return _finish_pages(pages, keep_chars)
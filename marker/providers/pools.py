@@ -0,0 +1,74 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+_pools: Dict[Tuple[str, int], ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+# What a worker is handed instead of the document: a path, or the name and size of
+# the shared memory block holding the document's bytes
+WorkerSource = str | Tuple[str, int]
+
+
+def get_pool(name: str, workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool shared by every document in this process, one per `name` and worker
+    count.  Other threads may be submitting to a pool at any time, so a pool is never
+    shut down to resize it; asking for another worker count gets another pool.
+    """
+    with _pools_lock:
+        pool = _pools.get((name, workers))
+        if pool is None:
+            # Spawned, so workers never inherit pdfium state from the parent
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[(name, workers)] = pool
+        return pool
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+def can_start_workers() -> bool:
+    # Daemonic processes, like convert.py's pool workers, can't start children
+    return not multiprocessing.current_process().daemon
+
+
+def share_source(source: str | bytes) -> Tuple[WorkerSource, Optional[shared_memory.SharedMemory]]:
+    """
+    Paths are passed to workers as they are.  Bytes are copied once into shared memory,
+    instead of being pickled to every worker; the caller must `release_source` the
+    returned block once the workers are done.
+    """
+    if not isinstance(source, bytes):
+        return source, None
+    buffer = shared_memory.SharedMemory(create=True, size=max(1, len(source)))
+    buffer.buf[:len(source)] = source
+    return (buffer.name, len(source)), buffer
+
+
+def release_source(buffer: Optional[shared_memory.SharedMemory]):
+    if buffer is not None:
+        buffer.close()
+        buffer.unlink()
+
+
+def load_source(source: WorkerSource) -> str | bytes:
+    # Runs in a worker
+    if not isinstance(source, tuple):
+        return source
+    name, size = source
+    buffer = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(buffer.buf[:size])
+    finally:
+        buffer.close()
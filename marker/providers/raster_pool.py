@@ -0,0 +1,115 @@
+import math
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pypdfium2 as pdfium
+from PIL import Image
+
+from marker.logger import get_logger
+from marker.providers.pools import WorkerSource, get_pool, load_source, release_source, share_source
+
+logger = get_logger()
+
+
+def _render_range(
+    source: WorkerSource,
+    idxs: List[int],
+    dpi: int,
+    flatten: bool,
+    buffer_name: str,
+    offsets: List[int],
+    capacities: List[int],
+) -> List[Tuple[Tuple[int, int], Optional[bytes]]]:
+    """
+    Runs in a pool worker.  Renders `idxs` and writes each page's RGB pixels into the
+    shared buffer at its offset.  Returns the (width, height) of every page, along with
+    the pixels themselves for a page that didn't fit its slot.
+    """
+    from pdftext.pdf.utils import flatten as flatten_pdf_page
+
+    buffer = shared_memory.SharedMemory(name=buffer_name)
+    doc = pdfium.PdfDocument(load_source(source))
+    try:
+        if flatten:
+            doc.init_forms()
+        results = []
+        for idx, offset, capacity in zip(idxs, offsets, capacities):
+            page = doc[idx]
+            if flatten:
+                flatten_pdf_page(page)
+                page = doc[idx]
+            image = page.render(scale=dpi / 72, draw_annots=False).to_pil().convert("RGB")
+            pixels = np.asarray(image)
+            if pixels.nbytes > capacity:
+                results.append((image.size, image.tobytes()))
+                continue
+            target = np.ndarray(pixels.shape, dtype=np.uint8, buffer=buffer.buf, offset=offset)
+            target[:] = pixels
+            del target
+            results.append((image.size, None))
+        return results
+    finally:
+        doc.close()
+        buffer.close()
+
+
+def _page_capacity(page: pdfium.PdfPage, dpi: int) -> int:
+    # Rotation only swaps width and height, so the pixel count bound holds either way
+    width, height = page.get_size()
+    scale = dpi / 72
+    return (math.ceil(width * scale) + 2) * (math.ceil(height * scale) + 2) * 3
+
+
+def render_pages_parallel(
+    doc: pdfium.PdfDocument,
+    source: str | bytes,
+    idxs: List[int],
+    dpi: int,
+    flatten: bool,
+    workers: int,
+) -> List[Image.Image]:
+    """
+    Renders `idxs` across the shared process pool, in one contiguous page range per
+    worker.  Pixels come back through a shared memory buffer instead of being pickled
+    through the pool's pipes.  PIL can't borrow memory for RGB images, so the one copy
+    left is into the returned images, after which the buffer is freed.
+    """
+    capacities = [_page_capacity(doc[idx], dpi) for idx in idxs]
+    offsets = np.concatenate([[0], np.cumsum(capacities)[:-1]]).astype(int).tolist()
+
+    buffer = shared_memory.SharedMemory(create=True, size=max(1, sum(capacities)))
+    worker_source, doc_buffer = share_source(source)
+    try:
+        pool = get_pool("raster", workers)
+        chunk_size = math.ceil(len(idxs) / workers)
+        futures = [
+            pool.submit(
+                _render_range,
+                worker_source,
+                idxs[i:i + chunk_size],
+                dpi,
+                flatten,
+                buffer.name,
+                offsets[i:i + chunk_size],
+                capacities[i:i + chunk_size],
+            )
+            for i in range(0, len(idxs), chunk_size)
+        ]
+        results = [result for future in futures for result in future.result()]
+
+        images = []
+        for (size, overflow), offset in zip(results, offsets):
+            if overflow is not None:
+                images.append(Image.frombytes("RGB", size, overflow))
+                continue
+            view = buffer.buf[offset:offset + size[0] * size[1] * 3]
+            try:
+                images.append(Image.frombytes("RGB", size, view))
+            finally:
+                view.release()
+        return images
+    finally:
+        buffer.close()
+        buffer.unlink()
+        release_source(doc_buffer)
@@ -0,0 +1,151 @@
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import pypdfium2 as pdfium
+from pdftext.pdf.utils import flatten as flatten_pdf_page
+
+from marker.providers.char_index import PageCharIndex
+
+
+class DocumentSession:
+    """
+    Owns the one parsed pdfium handle of a conversion.  The provider, builders and
+    processors borrow it instead of opening the PDF again, along with the loaded
+    pages, text pages and outline, which are cached the first time they're needed,
+    and the character index the provider builds while extracting text.
+
+    pdfium is not thread safe, so every borrow holds the session lock.
+    """
+
+    def __init__(self, source: str | bytes, flatten_pdf: bool = True, max_cached_pages: int = 32):
+        self.source = source
+        self.flatten_pdf = flatten_pdf
+        self.max_cached_pages = max_cached_pages
+        self.opens = 0
+        self.open_seconds = 0.0
+        self.borrows = 0
+        self.page_loads = 0
+        self.page_hits = 0
+        self._doc: Optional[pdfium.PdfDocument] = None
+        self._fitz_doc = None
+        self._pages: OrderedDict[int, pdfium.PdfPage] = OrderedDict()
+        self._textpages: OrderedDict[int, pdfium.PdfTextPage] = OrderedDict()
+        self._flattened = set()
+        self._toc: Optional[List[Any]] = None
+        # Filled by the provider while it extracts text, survives close()
+        self.char_index: Dict[int, PageCharIndex] = {}
+        self._lock = threading.RLock()
+
+    def _open(self) -> pdfium.PdfDocument:
+        if self._doc is None:
+            start = time.perf_counter()
+            self._doc = pdfium.PdfDocument(self.source)
+            # Must be called on the parent pdf, before retrieving pages to render correctly
+            if self.flatten_pdf:
+                self._doc.init_forms()
+            self.opens += 1
+            self.open_seconds += time.perf_counter() - start
+        return self._doc
+
+    @contextlib.contextmanager
+    def borrow(self):
+        with self._lock:
+            self.borrows += 1
+            yield self._open()
+
+    def _cache(self, cache: OrderedDict, idx: int, value):
+        cache[idx] = value
+        # Dropped pages are closed by pypdfium2 once nothing references them anymore
+        while len(cache) > self.max_cached_pages:
+            cache.popitem(last=False)
+
+    def get_page(self, idx: int, flatten: bool = False) -> pdfium.PdfPage:
+        """
+        A loaded page.  With `flatten`, form fields and annotations are merged into
+        the page content first, which only happens once per page.
+        """
+        with self._lock:
+            doc = self._open()
+            if flatten and idx not in self._flattened:
+                flatten_pdf_page(doc[idx])
+                self._flattened.add(idx)
+                # Flattening invalidates the loaded page, it has to be reloaded
+                self._pages.pop(idx, None)
+                self._textpages.pop(idx, None)
+
+            page = self._pages.get(idx)
+            if page is not None:
+                self._pages.move_to_end(idx)
+                self.page_hits += 1
+                return page
+
+            self.page_loads += 1
+            page = doc[idx]
+            self._cache(self._pages, idx, page)
+            return page
+
+    def get_textpage(self, idx: int) -> pdfium.PdfTextPage:
+        with self._lock:
+            textpage = self._textpages.get(idx)
+            if textpage is None:
+                textpage = self.get_page(idx).get_textpage()
+                self._cache(self._textpages, idx, textpage)
+            else:
+                self._textpages.move_to_end(idx)
+            return textpage
+
+    def get_toc(self) -> List[Any]:
+        # The outline is walked once, its items are plain tuples that outlive the handle
+        with self._lock:
+            self.borrows += 1
+            if self._toc is None:
+                self._toc = list(self._open().get_toc())
+            return self._toc
+
+    def get_fitz_doc(self):
+        """
+        The same document opened with PyMuPDF, for the text block lookups pdfium
+        doesn't offer.  Opened once per session.
+        """
+        with self._lock:
+            self.borrows += 1
+            if self._fitz_doc is None:
+                import fitz
+
+                start = time.perf_counter()
+                if isinstance(self.source, bytes):
+                    self._fitz_doc = fitz.open(stream=self.source, filetype="pdf")
+                else:
+                    self._fitz_doc = fitz.open(self.source)
+                self.opens += 1
+                self.open_seconds += time.perf_counter() - start
+            return self._fitz_doc
+
+    def __len__(self) -> int:
+        with self.borrow() as doc:
+            return len(doc)
+
+    def close(self):
+        with self._lock:
+            self._textpages.clear()
+            self._pages.clear()
+            self._flattened.clear()
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+            if self._fitz_doc is not None:
+                self._fitz_doc.close()
+                self._fitz_doc = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "opens": self.opens,
+                "open_seconds": round(self.open_seconds, 4),
+                "borrows": self.borrows,
+                "page_loads": self.page_loads,
+                "page_hits": self.page_hits,
+            }
@@ -1,3 +1,13 @@
+from typing import Sequence
+
+import numpy as np
+
+# Every code point `str.isspace` (and so the `\s` regex class) matches lies below U+3001
+_WHITESPACE = np.array([c for c in range(0x3001) if chr(c).isspace()], dtype=np.uint32)
+_ASCII_ALNUM = np.array([chr(c).isalnum() for c in range(128)], dtype=bool)
+_SPACE, _NEWLINE = ord(" "), ord("\n")
+
+
 def alphanum_ratio(text):
     text = text.replace(" ", "")
     text = text.replace("\n", "")
@@ -8,3 +18,78 @@ def alphanum_ratio(text):
 
     ratio = alphanumeric_count / len(text)
     return ratio
+
+
+def _count_runs(mask: np.ndarray) -> int:
+    if len(mask) == 0:
+        return 0
+    return int(mask[0]) + int(np.count_nonzero(mask[1:] & ~mask[:-1]))
+
+
+class TextQuality:
+    """
+    The heuristics used to tell garbled text from good text, computed over the code
+    points of the text at once instead of with a regex pass per ratio.  The ratios
+    are the same as `PdfProvider.detect_bad_ocr` always used:
+
+    - `space_ratio`: runs of whitespace against whitespace runs plus other characters
+    - `newline_ratio`: runs of newlines against newline runs plus other characters
+    - `alphanum_ratio`: alphanumeric characters among everything but spaces and newlines
+    - `invalid_chars`: how many characters are in the invalid set
+    """
+
+    def __init__(
+        self,
+        length: int,
+        space_ratio: float,
+        newline_ratio: float,
+        alphanum_ratio: float,
+        invalid_chars: int,
+    ):
+        self.length = length
+        self.space_ratio = space_ratio
+        self.newline_ratio = newline_ratio
+        self.alphanum_ratio = alphanum_ratio
+        self.invalid_chars = invalid_chars
+
+    @classmethod
+    def from_text(cls, text: str, invalid_chars: Sequence[str] = ()) -> "TextQuality":
+        codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+        length = len(codes)
+        if length == 0:
+            return cls(0, 0.0, 0.0, 1.0, 0)
+
+        is_space = np.isin(codes, _WHITESPACE)
+        space_runs = _count_runs(is_space)
+        space_ratio = space_runs / (space_runs + length - int(np.count_nonzero(is_space)))
+
+        is_newline = codes == _NEWLINE
+        newline_runs = _count_runs(is_newline)
+        newline_ratio = newline_runs / (newline_runs + length - int(np.count_nonzero(is_newline)))
+
+        counted = codes[(codes != _SPACE) & ~is_newline]
+        if len(counted) == 0:
+            alnum_ratio = 1.0
+        else:
+            is_ascii = counted < 128
+            alnum = int(np.count_nonzero(_ASCII_ALNUM[counted[is_ascii]]))
+            # Only characters outside ASCII need a per-character unicode lookup
+            non_ascii = counted[~is_ascii]
+            if len(non_ascii):
+                alnum += sum(map(str.isalnum, non_ascii.tobytes().decode("utf-32-le", "surrogatepass")))
+            alnum_ratio = alnum / len(counted)
+
+        invalid_codes = [ord(c) for c in invalid_chars if len(c) == 1]
+        invalid = int(np.count_nonzero(np.isin(codes, invalid_codes))) if invalid_codes else 0
+        return cls(length, space_ratio, newline_ratio, alnum_ratio, invalid)
+
+    def is_bad(self, space_threshold: float, newline_threshold: float, alphanum_threshold: float) -> bool:
+        if self.length == 0:
+            # Assume OCR failed if we have no text
+            return True
+        return any([
+            self.space_ratio > space_threshold,
+            self.newline_ratio > newline_threshold,
+            self.alphanum_ratio < alphanum_threshold,  # Garbled text
+            self.invalid_chars > max(6.0, self.length * 0.03),
+        ])
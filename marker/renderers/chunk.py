@@ -5,6 +5,7 @@ from bs4 import BeautifulSoup
 from pydantic import BaseModel
 
 from marker.renderers.json import JSONRenderer, JSONBlockOutput
+from marker.schema.blocks import BlockOutput
 from marker.schema.document import Document
 from marker.settings import settings
 from marker.renderers.markdown import cleanup_text, Markdownify
@@ -108,56 +109,55 @@ class ChunkRenderer(JSONRenderer):
             block_math_delimiters=self.block_math_delimiters,
         )
 
+    def page_chunks(self, document: Document, page_output: BlockOutput) -> List[FlatBlockOutput]:
+        # This will get the top-level blocks from the page
+        json_output = self.extract_json(document, page_output)
+        return json_to_chunks(json_output, set([str(block) for block in self.image_blocks]))
+
+    def chunks_to_json(self, chunk_output: List[FlatBlockOutput]) -> Tuple[dict, dict]:
+        temp = {}
+        temp_imgs = {}
+
+        for block in [chunk.model_dump() for chunk in chunk_output]:
+            temp_id = str(block['id']).split('/')
+            chunk_html = block['html']
+            markdown = self.md_cls.convert(chunk_html)
+            markdown = cleanup_text(markdown)
+
+            if markdown.strip() and temp_id[-2] in ['Text', 'SectionHeader', 'ListGroup']:  # Only include blocks with non-empty markdown
+                temp[str(block['id'])] = {
+                    'page': int(temp_id[2]),
+                    'block_id': int(temp_id[-1]),
+                    'block_type': temp_id[-2],
+                    'html': chunk_html,
+                    'markdown': markdown,
+                    'bbox': block['bbox'],
+                }
+                temp_imgs.update(block['images'] if block['images'] else {})
+            elif not (temp_id[-2] in ['Text', 'SectionHeader', 'ListGroup']):
+                temp[str(block['id'])] = {
+                    'page': int(temp_id[2]),
+                    'block_id': int(temp_id[-1]),
+                    'block_type': temp_id[-2],
+                    'html': chunk_html,
+                    'markdown': markdown,
+                    'bbox': block['bbox'],
+                }
+                temp_imgs.update(block['images'] if block['images'] else {})
+        return temp, temp_imgs
+
     def __call__(self, document: Document) -> Optional[ChunkOutput|Dict[str, dict]]:
         document_output = document.render(self.block_config)
-        json_output = []
-        for page_output in document_output.children:
-            json_output.append(self.extract_json(document, page_output))
-
-        # This will get the top-level blocks from every page
         chunk_output = []
-        for item in json_output:
-            chunks = json_to_chunks(item, set([str(block) for block in self.image_blocks]))
-            chunk_output.extend(chunks)
+        for page_output in document_output.children:
+            chunk_output.extend(self.page_chunks(document, page_output))
         page_info = {
             page.page_id: {"bbox": page.polygon.bbox, "polygon": page.polygon.polygon}
             for page in document.pages
         }
 
         if self.output_json:
-            out = {
-                "blocks": [chunk.model_dump() for chunk in chunk_output],
-                "page_info": page_info,
-            }
-            temp = {}
-            temp_imgs = {}
-
-            for block in out['blocks']:
-                temp_id = str(block['id']).split('/')
-                chunk_html = block['html']
-                markdown = self.md_cls.convert(chunk_html)
-                markdown = cleanup_text(markdown)
-
-                if markdown.strip() and temp_id[-2] in ['Text', 'SectionHeader', 'ListGroup']:  # Only include blocks with non-empty markdown
-                    temp[str(block['id'])] = {
-                        'page': int(temp_id[2]),
-                        'block_id': int(temp_id[-1]),
-                        'block_type': temp_id[-2],
-                        'html': chunk_html,
-                        'markdown': markdown,
-                        'bbox': block['bbox'],
-                    }
-                    temp_imgs.update(block['images'] if block['images'] else {})
-                elif not (temp_id[-2] in ['Text', 'SectionHeader', 'ListGroup']):
-                    temp[str(block['id'])] = {
-                        'page': int(temp_id[2]),
-                        'block_id': int(temp_id[-1]),
-                        'block_type': temp_id[-2],
-                        'html': chunk_html,
-                        'markdown': markdown,
-                        'bbox': block['bbox'],
-                    }
-                    temp_imgs.update(block['images'] if block['images'] else {})
+            temp, temp_imgs = self.chunks_to_json(chunk_output)
             return temp, temp_imgs, self.generate_document_metadata(document, document_output)
         
         else:
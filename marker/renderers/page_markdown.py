@@ -11,7 +11,9 @@ from pydantic import BaseModel
 
 from marker.renderers.html import HTMLRenderer
 from marker.schema import BlockTypes
+from marker.schema.blocks import BlockOutput
 from marker.schema.document import Document
+from marker.schema.groups.page import PageGroup
 
 logger = get_logger()
 
@@ -292,29 +294,28 @@ class PageMarkdownRenderer(HTMLRenderer):
             block_math_delimiters=self.block_math_delimiters,
         )
 
+    def render_page(self, document: Document, page: PageGroup, page_output: BlockOutput) -> Tuple[dict, dict]:
+        html, images = self.extract_html(document, page_output, level=1)
+        markdown = self.md_cls.convert(html)
+        markdown = cleanup_text(markdown)
+
+        # Ensure we set the correct blanks for pagination markers
+        if self.paginate_output:
+            if not markdown.startswith("\n\n"):
+                markdown = "\n\n" + markdown
+            if markdown.endswith(self.page_separator):
+                markdown += "\n\n"
+
+        if page.ignore_for_output:
+            return {'markdown': '','html': '','images': {}}, images
+        return {'markdown': markdown, 'html': html}, images
+
     def __call__(self, document: Document) -> Tuple[dict, dict]:
         document_output = document.render(self.block_config)
         page_output = {}
         temp_img = {}
         for i, (doc_child, doc_out_child) in enumerate(zip(document.pages, document_output.children)):
-            html, images = self.extract_html(document, doc_out_child, level=1)
-            markdown = self.md_cls.convert(html)
-            markdown = cleanup_text(markdown)
-
-            # Ensure we set the correct blanks for pagination markers
-            if self.paginate_output:
-                if not markdown.startswith("\n\n"):
-                    markdown = "\n\n" + markdown
-                if markdown.endswith(self.page_separator):
-                    markdown += "\n\n"
-
-            if doc_child.ignore_for_output:
-                page_output[doc_child.page_id] = {'markdown': '','html': '','images': {}}
-            else:
-                page_output[doc_child.page_id] = {
-                    'markdown': markdown,
-                    'html': html,
-                }
+            page_output[doc_child.page_id], images = self.render_page(document, doc_child, doc_out_child)
             temp_img.update(images if images else {})
 
         return page_output, temp_img, self.generate_document_metadata(document, document_output)
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import List, Sequence, Optional
+from typing import Any, Dict, Iterator, List, Sequence, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 import numpy as np
 import re
@@ -107,10 +107,28 @@ def heading_similarity(text1: str, text2: str) -> bool:
 class Document(BaseModel):
     filepath: str
     pages: List[PageGroup]
+    file_bytes: bytes | None = None  # Set when the document was opened from memory instead of a file
     block_type: BlockTypes = BlockTypes.Document
     table_of_contents: List[TocItem] | None = None
     debug_data_path: str | None = None  # Path that debug data was saved to
     exclude_list: List[BlockTypes] = [BlockTypes.Span, BlockTypes.Line]  # List of block types to exclude from output
+    # State processors carry between windows when a long document is converted a window of pages at a time.
+    # Entries are keyed by page id, so a page that is built in two windows is only counted once.
+    carry_state: Dict[str, Any] = {}
+    _session: Any = PrivateAttr(default=None)
+
+    def set_session(self, session):
+        # The provider's DocumentSession, for processors that need the parsed PDF
+        self._session = session
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def source(self) -> str | bytes:
+        # What to hand to pdfium/pdftext when the original file needs to be re-read
+        return self.file_bytes if self.file_bytes is not None else self.filepath
 
     def get_block(self, block_id: BlockId):
         page = self.get_page(block_id.page_id)
@@ -175,13 +193,20 @@ class Document(BaseModel):
             template += f"<content-ref src='{c.id}'></content-ref>"
         return template
 
-    def render(self, block_config: Optional[dict] = None):
-        child_content = []
-        section_hierarchy = None
-        for page in self.pages:
+    def render_pages(
+        self,
+        block_config: Optional[dict] = None,
+        section_hierarchy: Optional[dict] = None,
+        pages: Optional[List[PageGroup]] = None,
+    ) -> Iterator[Tuple[PageGroup, BlockOutput]]:
+        # Pages are rendered lazily, carrying the section hierarchy from one page to the next
+        for page in self.pages if pages is None else pages:
             rendered = page.render(self, None, section_hierarchy, block_config)
             section_hierarchy = rendered.section_hierarchy.copy()
-            child_content.append(rendered)
+            yield page, rendered
+
+    def render(self, block_config: Optional[dict] = None):
+        child_content = [rendered for _, rendered in self.render_pages(block_config)]
 
         out = DocumentOutput(
             children=child_content,
@@ -224,20 +249,34 @@ class Document(BaseModel):
         page_height = self.pages[0].polygon.height if self.pages else 0
 
         section_headers = self.get_all_chunks([BlockTypes.SectionHeader])
-        # Group similar section headers
-        text_groups = []
+        # Headers of earlier windows only help group this window's headers, they are not reclassified
+        history = self.carry_state.setdefault("section_headers", {})
+        page_ids = {page.page_id for page in self.pages}
+        chunks = [
+            {"bbox": bbox, "text": text}
+            for page_id in sorted(history) if page_id not in page_ids
+            for text, bbox in history[page_id]
+        ]
+        for page_id in page_ids:
+            history[page_id] = []
         for chunk in section_headers:
             text = chunk.raw_text(self).strip()
             if not text:
                 continue
-                
+
             bbox = chunk.polygon.bbox  # (x0, y0, x1, y1)
-            chunk_data = {
+            history[chunk.page_id].append((text, bbox))
+            chunks.append({
                 "id": (chunk.id),
                 "chunk": chunk,
                 "bbox": bbox,
                 "text": text
-            }
+            })
+
+        # Group similar section headers
+        text_groups = []
+        for chunk_data in chunks:
+            text = chunk_data["text"]
             
             # Find existing group or create new one
             found_group = False
@@ -259,6 +298,8 @@ class Document(BaseModel):
                 if page_height and core_logic(group, page_height):
                     # Add all chunk IDs from this group to reclassification list
                     for chunk_data in group:
+                        if 'id' not in chunk_data:
+                            continue
                         block = self.get_block(chunk_data['id'])
                         # print("Converting SectionHeader to PageHeader:", chunk_data['id'], block.raw_text(self))
                         newblock = block.convert_to_page_header()
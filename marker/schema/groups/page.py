@@ -5,7 +5,7 @@ import numpy as np
 from PIL import Image, ImageDraw
 
 from pdftext.schema import Reference
-from pydantic import computed_field
+from pydantic import PrivateAttr, computed_field
 
 from marker.providers import ProviderOutput
 from marker.schema import BlockTypes
@@ -35,6 +35,22 @@ class PageGroup(Group):
     block_description: str = "A single page in the document."
     refs: List[Reference] | None = None
     ocr_errors_detected: bool = False
+    # Renders images on demand when they aren't stored on the page, see PageImageCache
+    _image_source: Any = PrivateAttr(default=None)
+
+    def set_image_source(self, image_source):
+        self._image_source = image_source
+
+    def prefetch_images(self, pages: List["PageGroup"], highres: bool = False):
+        # Renders the images of `pages` that share this page's source in one batch
+        if self._image_source is None:
+            return
+        page_ids = [
+            p.page_id for p in pages
+            if p._image_source is self._image_source
+            and (p.highres_image if highres else p.lowres_image) is None
+        ]
+        self._image_source.prefetch(page_ids, highres=highres)
 
     def incr_block_id(self):
         if self.block_id is None:
@@ -56,6 +72,8 @@ class PageGroup(Group):
         **kwargs,
     ):
         image = self.highres_image if highres else self.lowres_image
+        if image is None and self._image_source is not None:
+            image = self._image_source.get(self.page_id, highres=highres)
 
         # Check if RGB, convert if needed
         if isinstance(image, Image.Image) and image.mode != "RGB":
@@ -77,6 +95,13 @@ class PageGroup(Group):
 
         return image
 
+    def get_image_size(self, highres: bool = False) -> Tuple[int, int]:
+        # Avoids rendering a page image just to read its size
+        image = self.highres_image if highres else self.lowres_image
+        if image is None and self._image_source is not None:
+            return self._image_source.size(self.page_id, highres=highres)
+        return self.get_image(highres=highres).size
+
     @computed_field
     @property
     def current_children(self) -> List[Block]:
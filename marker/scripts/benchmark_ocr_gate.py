@@ -0,0 +1,79 @@
+import os
+import time
+
+import click
+
+from marker.builders.line import LineBuilder
+from marker.providers.pdf import PdfProvider
+
+
+def page_texts(provider: PdfProvider, max_pages: int) -> list:
+    # The same text LineBuilder hands the ocr error model
+    texts = []
+    for page_id in list(provider.page_range)[:max_pages]:
+        lines = provider.page_lines.get(page_id, [])
+        texts.append("\n".join(" ".join(s.text for s in line.spans) for line in lines))
+    return texts
+
+
+@click.command(help="Report how many pages skip the ocr error model, and the time that saves.")
+@click.argument("in_folder", type=str)
+@click.option("--max_files", type=int, default=None, help="Maximum number of PDFs to benchmark.")
+@click.option("--max_pages", type=int, default=200, help="Maximum number of pages per PDF.")
+@click.option("--batch_size", type=int, default=None, help="Batch size for the ocr error model.")
+def benchmark_ocr_gate_cli(in_folder: str, max_files: int, max_pages: int, batch_size: int):
+    from surya.ocr_error import OCRErrorPredictor
+
+    model = OCRErrorPredictor()
+    model.disable_tqdm = True
+    builder = LineBuilder(None, model, {"ocr_error_batch_size": batch_size})
+
+    files = sorted(
+        os.path.join(in_folder, f) for f in os.listdir(in_folder) if f.lower().endswith(".pdf")
+    )[:max_files]
+
+    total_pages, total_skipped, total_disagree = 0, 0, 0
+    total_full, total_gated = 0.0, 0.0
+    for fpath in files:
+        provider = PdfProvider(fpath, {})
+        texts = page_texts(provider, max_pages)
+        provider.close()
+        if not texts:
+            continue
+
+        # The ungated run labels every page, the gated one only pays for the ambiguous pages
+        start = time.perf_counter()
+        model_labels = model(texts, batch_size=builder.get_ocr_error_batch_size()).labels
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        gate_labels = [builder.text_label(provider.text_quality(text), provider) for text in texts]
+        ambiguous = [text for text, label in zip(texts, gate_labels) if label is None]
+        if ambiguous:
+            model(ambiguous, batch_size=builder.get_ocr_error_batch_size())
+        gated = time.perf_counter() - start
+
+        skipped = len(texts) - len(ambiguous)
+        disagree = sum(
+            1 for gate, label in zip(gate_labels, model_labels) if gate is not None and gate != label
+        )
+        total_pages += len(texts)
+        total_skipped += skipped
+        total_disagree += disagree
+        total_full += full
+        total_gated += gated
+        click.echo(
+            f"{os.path.basename(fpath)}: {skipped}/{len(texts)} pages skipped the model, "
+            f"{full:.2f}s -> {gated:.2f}s, {disagree} labels differ from the model"
+        )
+
+    if total_pages:
+        click.echo(
+            f"Total: {total_skipped}/{total_pages} pages skipped the model, "
+            f"{total_full:.2f}s -> {total_gated:.2f}s ({total_full - total_gated:.2f}s saved), "
+            f"{total_disagree} labels differ from the model"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_ocr_gate_cli()
@@ -0,0 +1,80 @@
+import gc
+import os
+import time
+from typing import Dict, List, Tuple
+
+import click
+from rapidfuzz import fuzz
+
+from marker.converters.pdf import PdfConverter
+from marker.logger import configure_logging, get_logger
+from marker.models import create_model_dict
+from marker.utils.precision import PRECISIONS
+
+configure_logging()
+logger = get_logger()
+
+
+def convert_corpus(files: List[str], precision: str, force_ocr: bool) -> Tuple[Dict[str, str], int, float]:
+    """
+    Converts every file with models at `precision`.  Returns the markdown per file,
+    the pages converted and the conversion time, excluding model loading and one
+    untimed warmup conversion.
+    """
+    models = create_model_dict(lazy=False, precision=precision)
+    config = {"renderer": "markdown", "disable_tqdm": True, "force_ocr": force_ocr}
+
+    def convert(fpath: str):
+        converter = PdfConverter(artifact_dict=dict(models), config=dict(config))
+        output, document = converter(fpath)
+        return output["markdown"], len(document.pages)
+
+    convert(files[0])
+
+    outputs, total_pages = {}, 0
+    start = time.perf_counter()
+    for fpath in files:
+        outputs[fpath], pages = convert(fpath)
+        total_pages += pages
+    elapsed = time.perf_counter() - start
+
+    del models
+    gc.collect()
+    return outputs, total_pages, elapsed
+
+
+@click.command(help="Compare conversion speed and output quality across model precisions.")
+@click.argument("in_folder", type=str)
+@click.option(
+    "--precision",
+    "precisions",
+    multiple=True,
+    type=click.Choice([p for p in PRECISIONS if p != "float32"]),
+    default=("int8", "bfloat16"),
+    help="Precision to compare against float32, can be given several times.",
+)
+@click.option("--max_files", type=int, default=None, help="Maximum number of files to convert.")
+@click.option("--force_ocr", is_flag=True, default=False, help="Force OCR, so the recognition path is measured too.")
+def benchmark_precision_cli(in_folder: str, precisions: Tuple[str, ...], max_files: int, force_ocr: bool):
+    files = sorted(
+        os.path.join(in_folder, f)
+        for f in os.listdir(in_folder)
+        if os.path.isfile(os.path.join(in_folder, f))
+    )[:max_files]
+    if not files:
+        raise click.ClickException(f"No files found in {in_folder}")
+
+    baseline, pages, baseline_time = convert_corpus(files, "float32", force_ocr)
+    click.echo(f"float32: {pages / baseline_time:.2f} pages/sec over {pages} pages")
+
+    for precision in precisions:
+        outputs, pages, elapsed = convert_corpus(files, precision, force_ocr)
+        similarity = [fuzz.ratio(baseline[f], outputs[f]) for f in files]
+        click.echo(
+            f"{precision}: {pages / elapsed:.2f} pages/sec ({baseline_time / elapsed:.2f}x float32), "
+            f"markdown similarity to float32 mean {sum(similarity) / len(similarity):.1f}, min {min(similarity):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_precision_cli()
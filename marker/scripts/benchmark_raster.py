@@ -0,0 +1,55 @@
+import time
+
+import click
+
+from marker.providers.pdf import PdfProvider
+
+
+def time_rasterization(
+    fpath: str, dpis: list, single_pass: bool, max_pages: int, raster_workers: int = 1
+) -> tuple:
+    provider = PdfProvider(
+        fpath,
+        {"force_ocr": True, "single_pass_render": single_pass, "raster_workers": raster_workers},
+    )
+    pages = list(provider.page_range)[:max_pages]
+
+    start = time.perf_counter()
+    provider.get_page_images(pages, dpis)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(pages)
+
+
+@click.command(help="Compare raster time per page for one render per DPI against a single render per page.")
+@click.argument("fpath", type=str)
+@click.option("--lowres_dpi", type=int, default=96, help="Low resolution DPI.")
+@click.option("--highres_dpi", type=int, default=192, help="High resolution DPI.")
+@click.option("--max_pages", type=int, default=50, help="Maximum number of pages to rasterize.")
+@click.option("--runs", type=int, default=3, help="Runs per mode; the fastest one counts.")
+@click.option("--raster_workers", type=int, default=1, help="Also time single pass rendering across this many processes.")
+def benchmark_raster_cli(
+    fpath: str, lowres_dpi: int, highres_dpi: int, max_pages: int, runs: int, raster_workers: int
+):
+    dpis = [lowres_dpi, highres_dpi]
+    results = {}
+    for single_pass in (False, True):
+        elapsed, pages = min(
+            time_rasterization(fpath, dpis, single_pass, max_pages) for _ in range(max(1, runs))
+        )
+        results[single_pass] = elapsed / pages
+        mode = "single pass" if single_pass else "render per dpi"
+        click.echo(f"{mode}: {elapsed / pages * 1000:.1f} ms/page over {pages} pages")
+
+    click.echo(f"Speedup: {results[False] / results[True]:.2f}x")
+
+    if raster_workers > 1:
+        # The first run also pays for starting the pool, so it isn't counted
+        elapsed, pages = min(
+            time_rasterization(fpath, dpis, True, max_pages, raster_workers) for _ in range(max(2, runs))
+        )
+        click.echo(f"single pass, {raster_workers} workers: {elapsed / pages * 1000:.1f} ms/page over {pages} pages")
+        click.echo(f"Speedup over one process: {results[True] / (elapsed / pages):.2f}x")
+
+
+if __name__ == "__main__":
+    benchmark_raster_cli()
@@ -0,0 +1,74 @@
+import os
+import time
+
+import click
+import pypdfium2 as pdfium
+
+from marker.providers.pdf import PdfProvider
+
+
+def time_open(fpath: str, flatten_pdf: bool, runs: int) -> float:
+    # What every borrow used to cost: parse the document and set up its forms
+    elapsed = []
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        doc = pdfium.PdfDocument(fpath)
+        if flatten_pdf:
+            doc.init_forms()
+        len(doc)
+        elapsed.append(time.perf_counter() - start)
+        doc.close()
+    return min(elapsed)
+
+
+def run_session(fpath: str, max_pages: int, dpi: int) -> dict:
+    """
+    Replays the document accesses of a conversion with lazy page images: one render
+    call per page at each resolution, then the outline and text block lookups of the
+    TOC processor.
+    """
+    provider = PdfProvider(fpath, {})
+    pages = list(provider.page_range)[:max_pages]
+    for page_id in pages:
+        provider.get_images([page_id], dpi)
+        provider.get_images([page_id], dpi * 2)
+    provider.session.get_toc()
+    try:
+        provider.session.get_fitz_doc()
+    except ImportError:
+        pass
+    stats = provider.session.stats()
+    provider.close()
+    return stats
+
+
+@click.command(help="Report how many PDF opens and how much parse time the document session saves.")
+@click.argument("in_folder", type=str)
+@click.option("--max_files", type=int, default=None, help="Maximum number of PDFs to benchmark.")
+@click.option("--max_pages", type=int, default=200, help="Maximum number of pages to touch per PDF.")
+@click.option("--dpi", type=int, default=96, help="Low resolution DPI; high resolution is twice this.")
+@click.option("--open_runs", type=int, default=3, help="Runs to time one open; the fastest one counts.")
+def benchmark_session_cli(in_folder: str, max_files: int, max_pages: int, dpi: int, open_runs: int):
+    files = sorted(
+        os.path.join(in_folder, f) for f in os.listdir(in_folder) if f.lower().endswith(".pdf")
+    )[:max_files]
+
+    total_opens, total_borrows, total_saved = 0, 0, 0.0
+    for fpath in files:
+        stats = run_session(fpath, max_pages, dpi)
+        open_time = time_open(fpath, PdfProvider.flatten_pdf, open_runs)
+        saved = (stats["borrows"] - stats["opens"]) * open_time
+        total_opens += stats["opens"]
+        total_borrows += stats["borrows"]
+        total_saved += saved
+        click.echo(
+            f"{os.path.basename(fpath)}: {stats['opens']} opens instead of {stats['borrows']}, "
+            f"{open_time * 1000:.1f} ms per open, {saved:.2f}s of parsing saved, "
+            f"{stats['page_hits']} page loads reused"
+        )
+
+    click.echo(f"Total: {total_opens} opens instead of {total_borrows}, {total_saved:.2f}s of parsing saved")
+
+
+if __name__ == "__main__":
+    benchmark_session_cli()
@@ -0,0 +1,75 @@
+import os
+
+import click
+from pdftext.extraction import table_output
+
+from marker.providers.pdf import PdfProvider
+
+
+def page_regions(width: int, height: int) -> list:
+    # Stand-ins for detected tables: the whole page, and its top and bottom halves
+    return [[0, 0, width, height], [0, 0, width, height // 2], [0, height // 2, width, height]]
+
+
+def compare_file(fpath: str, max_pages: int, dpi: int) -> dict:
+    """
+    Cell text from the provider's character index against pdftext's `table_output`,
+    over the same regions of every indexed page.
+    """
+    provider = PdfProvider(fpath, {"char_index": True})
+    char_index = provider.session.char_index
+    pages = [page for page in list(provider.page_range)[:max_pages] if page in char_index]
+    provider.close()
+
+    stats = {"pages": len(pages), "runs": 0, "text_diffs": 0, "count_diffs": 0}
+    if not pages:
+        return stats
+
+    table_inputs = []
+    for page in pages:
+        index = char_index[page]
+        img_size = [int(index.width * dpi / 72), int(index.height * dpi / 72)]
+        table_inputs.append({"tables": page_regions(*img_size), "img_size": img_size})
+
+    expected = table_output(fpath, table_inputs, page_range=pages)
+    for page, table_input, page_expected in zip(pages, table_inputs, expected):
+        page_actual = char_index[page].table_text(table_input["tables"], table_input["img_size"])
+        for actual_runs, expected_runs in zip(page_actual, page_expected):
+            stats["runs"] += len(expected_runs)
+            if len(actual_runs) != len(expected_runs):
+                stats["count_diffs"] += 1
+            stats["text_diffs"] += sum(
+                1 for actual, exp in zip(actual_runs, expected_runs) if actual["text"] != exp["text"]
+            )
+    return stats
+
+
+@click.command(help="Compare table cell text from the provider's character index against pdftext's table_output.")
+@click.argument("in_folder", type=str)
+@click.option("--max_files", type=int, default=None, help="Maximum number of PDFs to compare.")
+@click.option("--max_pages", type=int, default=50, help="Maximum number of pages per PDF.")
+@click.option("--dpi", type=int, default=192, help="DPI of the image the regions are given in.")
+def compare_table_text_cli(in_folder: str, max_files: int, max_pages: int, dpi: int):
+    files = sorted(
+        os.path.join(in_folder, f) for f in os.listdir(in_folder) if f.lower().endswith(".pdf")
+    )[:max_files]
+
+    total_runs, total_text_diffs, total_count_diffs = 0, 0, 0
+    for fpath in files:
+        stats = compare_file(fpath, max_pages, dpi)
+        total_runs += stats["runs"]
+        total_text_diffs += stats["text_diffs"]
+        total_count_diffs += stats["count_diffs"]
+        click.echo(
+            f"{os.path.basename(fpath)}: {stats['pages']} pages, {stats['runs']} runs, "
+            f"{stats['text_diffs']} with different text, {stats['count_diffs']} regions split differently"
+        )
+
+    click.echo(
+        f"Total: {total_runs} runs, {total_text_diffs} with different text, "
+        f"{total_count_diffs} regions split differently"
+    )
+
+
+if __name__ == "__main__":
+    compare_table_text_cli()
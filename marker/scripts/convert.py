@@ -10,9 +10,10 @@ from marker.utils.batch import get_batch_sizes_worker_counts
 # Ensure threads don't contend
 os.environ["MKL_DYNAMIC"] = "FALSE"
 os.environ["OMP_DYNAMIC"] = "FALSE"
-os.environ["OMP_NUM_THREADS"] = "2"  # Avoid OpenMP issues with multiprocessing
-os.environ["OPENBLAS_NUM_THREADS"] = "2"
-os.environ["MKL_NUM_THREADS"] = "2"
+# Defaults only; workers inherit the thread plan the parent computed
+os.environ.setdefault("OMP_NUM_THREADS", "2")  # Avoid OpenMP issues with multiprocessing
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "2")
+os.environ.setdefault("MKL_NUM_THREADS", "2")
 os.environ["GRPC_VERBOSITY"] = "ERROR"
 os.environ["GLOG_minloglevel"] = "2"
 os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = (
@@ -25,22 +26,36 @@ import traceback
 
 import click
 import torch.multiprocessing as mp
+from multiprocessing.reduction import ForkingPickler
 from tqdm import tqdm
 import gc
 
 from marker.config.parser import ConfigParser
 from marker.config.printer import CustomClickPrinter
 from marker.logger import configure_logging, get_logger
-from marker.models import create_model_dict
+from marker.models import create_model_dict, share_model_memory
 from marker.output import output_exists, save_output
+from marker.settings import settings
 from marker.utils.gpu import GPUManager
+from marker.utils.resources import PIN_MODES, pin_worker, plan_threads
+from marker.utils.warmup import warmup_models
 
 configure_logging()
 logger = get_logger()
 
 
-def worker_init():
-    model_dict = create_model_dict()
+def worker_init(shared_models=None, thread_plan=None, worker_slots=None):
+    if thread_plan is not None:
+        pinned = pin_worker(thread_plan, worker_slots)
+        torch.set_num_threads(thread_plan.torch_threads)
+        if pinned:
+            logger.debug(f"Worker {os.getpid()} pinned to CPUs {pinned}")
+
+    # Shared models arrive with their weights mapped from the parent's shared memory
+    model_dict = shared_models if shared_models is not None else create_model_dict()
+    if settings.MODEL_WARMUP:
+        # Loads every model, so the first file a worker gets runs at steady-state speed
+        warmup_models(model_dict, compile=settings.MODEL_COMPILE)
 
     global model_refs
     model_refs = model_dict
@@ -57,6 +72,28 @@ def worker_exit():
         pass
 
 
+def unique_memory_mb() -> float:
+    # USS: memory that would be freed if this process exited, excluding shared pages
+    return psutil.Process().memory_full_info().uss / 2**20
+
+
+def load_shared_models():
+    """
+    Loads the models once in the parent and moves their weights to shared memory.
+    Returns None, so every worker loads its own copy, if they can't be sent to workers.
+    """
+    mp.set_sharing_strategy("file_system")  # One shm file per tensor, not one fd each
+    model_dict = create_model_dict(lazy=False)
+    shared_bytes = share_model_memory(model_dict)
+    try:
+        ForkingPickler.dumps(model_dict)
+    except Exception as e:
+        logger.warning(f"Models can't be shared with workers, loading them per worker: {e}")
+        return None
+    logger.info(f"Sharing {shared_bytes / 2**20:.0f} MB of model weights across workers")
+    return model_dict
+
+
 def process_single_pdf(args):
     page_count = 0
     fpath, cli_options = args
@@ -68,7 +105,7 @@ def process_single_pdf(args):
     out_folder = config_parser.get_output_folder(fpath)
     base_name = config_parser.get_base_filename(fpath)
     if cli_options.get("skip_existing") and output_exists(out_folder, base_name):
-        return page_count
+        return page_count, os.getpid(), unique_memory_mb()
 
     converter_cls = config_parser.get_converter_cls()
     config_dict = config_parser.generate_config_dict()
@@ -99,7 +136,7 @@ def process_single_pdf(args):
     finally:
         gc.collect()
 
-    return page_count
+    return page_count, os.getpid(), unique_memory_mb()
 
 
 @click.command(cls=CustomClickPrinter)
@@ -135,6 +172,18 @@ def process_single_pdf(args):
     default=None,
     help="Number of worker processes to use.  Set automatically by default, but can be overridden.",
 )
+@click.option(
+    "--shared_models",
+    is_flag=True,
+    default=False,
+    help="Load the models once and share their weights with all workers, instead of one copy per worker.  CPU only.",
+)
+@click.option(
+    "--pin_workers",
+    type=click.Choice(PIN_MODES),
+    default="none",
+    help="Pin each worker to its own set of physical cores, or to a NUMA node.",
+)
 @ConfigParser.common_options
 def convert_cli(in_folder: str, **kwargs):
     total_pages = 0
@@ -175,28 +224,46 @@ def convert_cli(in_folder: str, **kwargs):
 
         # Set proper batch sizes and thread counts
         total_processes = max(1, min(len(files_to_convert), workers))
-        kwargs["total_torch_threads"] = max(
-            2, psutil.cpu_count(logical=False) // total_processes
-        )
+        thread_plan = plan_threads(total_processes, pin=kwargs["pin_workers"])
+        thread_plan.apply_env()
+        logger.info(f"Thread plan: {thread_plan.describe()}")
+        kwargs["total_torch_threads"] = thread_plan.torch_threads
         kwargs.update(batch_sizes)
+        kwargs["detector_postprocessing_cpu_workers"] = thread_plan.detector_postprocessing_workers
 
         logger.info(
             f"Converting {len(files_to_convert)} pdfs in chunk {kwargs['chunk_idx'] + 1}/{kwargs['num_chunks']} with {total_processes} processes and saving to {kwargs['output_dir']}"
         )
+        shared_models = None
+        if kwargs["shared_models"]:
+            if gpu_manager.using_cuda():
+                logger.warning("--shared_models is only supported on CPU, loading models per worker")
+            else:
+                shared_models = load_shared_models()
         task_args = [(f, kwargs) for f in files_to_convert]
 
+        worker_memory = {}
         start_time = time.time()
         with mp.Pool(
             processes=total_processes,
             initializer=worker_init,
+            initargs=(shared_models, thread_plan, mp.Array("i", total_processes)),
             maxtasksperchild=kwargs["max_tasks_per_worker"],
         ) as pool:
             pbar = tqdm(total=len(task_args), desc="Processing PDFs", unit="pdf")
-            for page_count in pool.imap_unordered(process_single_pdf, task_args):
+            for page_count, pid, uss_mb in pool.imap_unordered(process_single_pdf, task_args):
                 pbar.update(1)
                 total_pages += page_count
+                worker_memory[pid] = max(uss_mb, worker_memory.get(pid, 0))
             pbar.close()
 
+        if worker_memory:
+            logger.info(
+                f"Peak unique memory per worker: max {max(worker_memory.values()):.0f} MB, "
+                f"mean {sum(worker_memory.values()) / len(worker_memory):.0f} MB over {len(worker_memory)} workers"
+                + (", model weights shared" if shared_models is not None else "")
+            )
+
         total_time = time.time() - start_time
         print(
             f"Inferenced {total_pages} pages in {total_time:.2f} seconds, for a throughput of {total_pages / total_time:.2f} pages/sec for chunk {chunk_idx + 1}/{kwargs['num_chunks']}"
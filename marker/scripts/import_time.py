@@ -0,0 +1,95 @@
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+import click
+
+# Optional stacks that importing the converter must not pull in; they should only
+# load once a component that needs them is used
+LAZY_MODULES = (
+    "google.genai",
+    "openai",
+    "anthropic",
+    "sklearn",
+    "fitz",
+    "weasyprint",
+    "mammoth",
+    "openpyxl",
+    "pptx",
+    "ebooklib",
+)
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Imports `module` in a fresh interpreter under `-X importtime`.  Returns the total
+    import time in milliseconds, and the self and cumulative microseconds of every
+    module loaded along the way.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise click.ClickException(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us))
+
+    total_ms = sum(self_us for self_us, _ in modules.values()) / 1000
+    return total_ms, modules
+
+
+def loaded_lazy_modules(modules: Dict[str, Tuple[int, int]]) -> List[str]:
+    return [
+        name
+        for name in LAZY_MODULES
+        if name in modules or any(m.startswith(name + ".") for m in modules)
+    ]
+
+
+@click.command(help="Measure the import time of marker modules and enforce a budget.")
+@click.option(
+    "--module",
+    "modules",
+    multiple=True,
+    default=("marker.converters.pdf",),
+    help="Module to import, can be given several times.",
+)
+@click.option("--budget_ms", type=float, default=4000, help="Fail if any import takes longer than this.")
+@click.option("--runs", type=int, default=3, help="Imports per module; the fastest one counts.")
+@click.option("--top", type=int, default=15, help="Number of slowest modules to list.")
+def import_time_cli(modules: Tuple[str, ...], budget_ms: float, runs: int, top: int):
+    failures = []
+    for module in modules:
+        timings = [measure_import(module) for _ in range(max(1, runs))]
+        total_ms, loaded = min(timings, key=lambda t: t[0])
+
+        click.echo(f"{module}: {total_ms:.0f} ms ({len(loaded)} modules, budget {budget_ms:.0f} ms)")
+        slowest = sorted(loaded.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        for name, (self_us, cumulative_us) in slowest:
+            click.echo(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+        if total_ms > budget_ms:
+            failures.append(f"{module} took {total_ms:.0f} ms, over the {budget_ms:.0f} ms budget")
+        eager = loaded_lazy_modules(loaded)
+        if eager:
+            failures.append(f"{module} eagerly imports optional modules: {', '.join(eager)}")
+
+    if failures:
+        for failure in failures:
+            click.echo(f"FAIL: {failure}", err=True)
+        sys.exit(1)
+    click.echo("Import time within budget")
+
+
+if __name__ == "__main__":
+    import_time_cli()
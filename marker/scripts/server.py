@@ -4,7 +4,8 @@ import click
 import os
 
 from pydantic import BaseModel, Field
-from starlette.responses import HTMLResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import HTMLResponse, JSONResponse
 
 from marker.config.parser import ConfigParser
 from marker.output import text_from_rendered
@@ -16,24 +17,36 @@ import io
 
 from fastapi import FastAPI, Form, File, UploadFile
 from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
+from marker.models import ModelRegistry
 from marker.settings import settings
+from marker.util import parse_range_str
+from marker.utils.admission import AdmissionRejected, PageBudget, count_pages
+from marker.utils.ingest import SpooledDocument
+from marker.providers.pools import shutdown_pools
 
 app_data = {}
 
 
-UPLOAD_DIRECTORY = "./uploads"
-os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app_data["models"] = create_model_dict()
+    app_data["models"] = ModelRegistry(
+        batching=settings.INFERENCE_BATCHING,
+        batch_max_wait=settings.INFERENCE_BATCH_MAX_WAIT,
+    ).load()
+    if settings.MODEL_WARMUP:
+        app_data["models"].warmup(compile=settings.MODEL_COMPILE)
+    app_data["admission"] = PageBudget(settings.ADMISSION_MAX_PAGES, max_wait=settings.ADMISSION_MAX_WAIT)
 
     yield
 
     if "models" in app_data:
+        app_data["models"].unload()
         del app_data["models"]
+    # pdftext and raster workers outlive single documents, stop them with the server
+    shutdown_pools()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -83,10 +96,38 @@ class CommonParams(BaseModel):
     ] = "markdown"
 
 
-async def _convert_pdf(params: CommonParams):
+async def _convert_pdf(params: CommonParams, source: str | bytes | None = None):
+    """
+    `source` replaces `params.filepath` when the document is already in memory, or in a
+    temporary file, as with uploads.
+    """
     assert params.output_format in ["markdown", "json", "html", "chunks"], (
         "Invalid output format"
     )
+    if source is None:
+        source = params.filepath
+    try:
+        page_range = parse_range_str(params.page_range) if params.page_range else None
+        # Opens the PDF, which can take a while for large documents
+        pages = await run_in_threadpool(count_pages, source, page_range)
+        async with app_data["admission"].reserve_async(pages):
+            return await _run_conversion(params, source)
+    except AdmissionRejected as e:
+        return JSONResponse(
+            content={"success": False, "error": str(e)},
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        # A malformed page range or a PDF that can't be opened
+        traceback.print_exc()
+        return {
+            "success": False,
+            "error": str(e),
+        }
+
+
+async def _run_conversion(params: CommonParams, source: str | bytes):
     try:
         options = params.model_dump()
         config_parser = ConfigParser(options)
@@ -95,12 +136,14 @@ async def _convert_pdf(params: CommonParams):
         converter_cls = PdfConverter
         converter = converter_cls(
             config=config_dict,
-            artifact_dict=app_data["models"],
+            artifact_dict=app_data["models"].artifact_dict(),
             processor_list=config_parser.get_processors(),
             renderer=config_parser.get_renderer(),
             llm_service=config_parser.get_llm_service(),
         )
-        rendered = converter(params.filepath)
+        # Off the event loop, so concurrent requests convert at the same time and their
+        # model calls can share batches with INFERENCE_BATCHING
+        rendered = await run_in_threadpool(converter, source)
         text, _, images = text_from_rendered(rendered)
         metadata = rendered.metadata
     except Exception as e:
@@ -127,6 +170,11 @@ async def _convert_pdf(params: CommonParams):
     }
 
 
+@app.get("/admission")
+async def admission_stats():
+    return app_data["admission"].stats()
+
+
 @app.post("/marker")
 async def convert_pdf(params: CommonParams):
     return await _convert_pdf(params)
@@ -142,21 +190,24 @@ async def convert_pdf_upload(
         ..., description="The PDF file to convert.", media_type="application/pdf"
     ),
 ):
-    upload_path = os.path.join(UPLOAD_DIRECTORY, file.filename)
-    with open(upload_path, "wb+") as upload_file:
-        file_contents = await file.read()
-        upload_file.write(file_contents)
-
-    params = CommonParams(
-        filepath=upload_path,
-        page_range=page_range,
-        force_ocr=force_ocr,
-        paginate_output=paginate_output,
-        output_format=output_format,
-    )
-    results = await _convert_pdf(params)
-    os.remove(upload_path)
-    return results
+    # Keep the upload in memory; only large files spill to a uniquely named temp file,
+    # so the client's filename never becomes a path on disk
+    suffix = os.path.splitext(file.filename or "")[1]
+    document = SpooledDocument(suffix=suffix if suffix[1:].isalnum() else ".pdf")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            document.write(chunk)
+
+        params = CommonParams(
+            filepath=None,
+            page_range=page_range,
+            force_ocr=force_ocr,
+            paginate_output=paginate_output,
+            output_format=output_format,
+        )
+        return await _convert_pdf(params, source=document.source)
+    finally:
+        document.cleanup()
 
 
 @click.command()
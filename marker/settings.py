@@ -21,14 +21,41 @@ class Settings(BaseSettings):
     # General
     OUTPUT_ENCODING: str = "utf-8"
     OUTPUT_IMAGE_FORMAT: str = "JPEG"
+    INMEMORY_MAX_BYTES: int = 64 * 1024 * 1024  # Larger documents are spilled to a temporary file
+    RASTER_WORKERS: int = 1  # Processes that render page images; 1 renders in the calling process
+    PDFTEXT_POOL: bool = True  # Keep pdftext's extraction workers alive across documents
+    STREAM_WINDOW_PAGES: Optional[int] = None  # Streamed conversions hold this many pages in memory at a time
 
     # LLM
     GOOGLE_API_KEY: Optional[str] = ""
 
+    # API server
+    JOB_WORKERS: int = 2  # Conversions that run at the same time
+    JOB_QUEUE_SIZE: int = 16  # Jobs allowed to wait before new ones get a 429
+    JOB_RESULT_TTL: int = 3600  # Seconds a finished job's result is kept
+    ADMISSION_MAX_PAGES: int = 1000  # Pages allowed in flight across all conversions
+    ADMISSION_MAX_WAIT: float = 30  # Seconds a request waits for page budget before a 429
+    ARTIFACT_TTL: int = 600  # Seconds images of a json+zstd response stay downloadable
+    ARTIFACT_STORE_MAX_BYTES: int = 256 * 1024 * 1024
+    INFERENCE_BATCHING: bool = False  # Merge model calls from concurrent conversions into shared batches
+    INFERENCE_BATCH_MAX_WAIT: float = 0.02  # Seconds a partial batch waits for more pages
+    RESULT_CACHE_BACKEND: Optional[str] = "memory"  # "memory", "disk" or None to disable
+    RESULT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    RESULT_CACHE_DIR: str = os.path.join(BASE_DIR, "cache", "results")
+
     # General models
     TORCH_DEVICE: Optional[str] = (
         None  # Note: MPS device does not work for text detection, and will default to CPU
     )
+    LAZY_MODEL_LOADING: bool = False  # Load each model the first time a conversion uses it, instead of up front (create_model_dict and the servers' ModelRegistry)
+    MODEL_IDLE_TTL: Optional[float] = None  # Seconds a lazily loaded model may sit unused before it is freed
+    MODEL_PRECISION: Optional[str] = None  # "float32", "bfloat16" (CPU autocast) or "int8" (CPU dynamic quantization)
+    INFERENCE_BACKEND: str = "torch"  # "onnx" runs layout, detection and OCR-error through onnxruntime on CPU
+    ONNX_CACHE_DIR: str = os.path.join(BASE_DIR, "cache", "onnx")
+    ONNX_INTRA_OP_THREADS: Optional[int] = None  # Defaults to torch's thread count
+    MODEL_WARMUP: bool = False  # Run models on synthetic pages at startup, before the first request
+    MODEL_COMPILE: bool = False  # torch.compile models during warmup
+    MODEL_COMPILE_CACHE_DIR: str = os.path.join(BASE_DIR, "cache", "torch_compile")
 
     @computed_field
     @property
@@ -47,7 +74,7 @@ class Settings(BaseSettings):
     @computed_field
     @property
     def MODEL_DTYPE(self) -> torch.dtype:
-        if self.TORCH_DEVICE_MODEL == "cuda":
+        if self.TORCH_DEVICE_MODEL == "cuda" and self.MODEL_PRECISION != "float32":
             return torch.bfloat16
         else:
             return torch.float32
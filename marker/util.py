@@ -34,6 +34,13 @@ def strings_to_classes(items: List[str]) -> List[type]:
     return classes
 
 
+def load_class(item: type | str) -> type:
+    # Classes can be referenced by import path, so optional stacks load only when used
+    if isinstance(item, str):
+        return strings_to_classes([item])[0]
+    return item
+
+
 def classes_to_strings(items: List[type]) -> List[str]:
     for item in items:
         if not inspect.isclass(item):
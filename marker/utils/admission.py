@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional
+
+import pypdfium2 as pdfium
+from pypdfium2 import PdfiumError
+
+
+def count_pages(source: str | bytes, page_range: Optional[List[int]] = None) -> int:
+    """
+    Number of pages a conversion will touch.  Only the PDF's page tree is read, so this
+    is cheap even for very large documents.  Inputs pdfium can't open (other formats,
+    missing files) count as one page and fail later in the conversion itself.
+    """
+    if page_range:
+        return len(page_range)
+    try:
+        doc = pdfium.PdfDocument(source)
+    except (PdfiumError, OSError):
+        return 1
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = 429
+
+
+class Reservation:
+    """
+    Pages held in a budget on behalf of one conversion.  `release` is idempotent, so it
+    can be called from every path that may end the conversion.
+    """
+
+    def __init__(self, budget: "PageBudget", pages: int):
+        self.budget = budget
+        self.pages = pages
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.budget.release(self.pages)
+
+
+class PageBudget:
+    """
+    Global budget of pages being converted at once.  Request size ranges from one page
+    to thousands, so pages - not requests - are what bound memory.  A request waits up
+    to `max_wait` seconds for room in the budget and is rejected after that.  A document
+    larger than the whole budget is admitted once nothing else is running.
+    """
+
+    poll_interval: float = 0.1
+
+    def __init__(self, max_pages: int, max_wait: float = 0):
+        self.max_pages = max_pages
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def _cost(self, pages: int) -> int:
+        return max(1, min(pages, self.max_pages))
+
+    def try_acquire(self, pages: int) -> bool:
+        cost = self._cost(pages)
+        with self._cond:
+            if self.in_flight + cost > self.max_pages:
+                return False
+            self.in_flight += cost
+            self.admitted += 1
+            return True
+
+    def release(self, pages: int):
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - self._cost(pages))
+            self._cond.notify_all()
+
+    def _reject(self, pages: int):
+        with self._cond:
+            self.rejected += 1
+        raise AdmissionRejected(
+            f"Page budget exhausted: {self.in_flight}/{self.max_pages} pages in flight, request needs {pages}",
+            retry_after=max(1, int(self.max_wait) or 5),
+        )
+
+    def acquire(self, pages: int):
+        """
+        Blocking acquire, for worker threads.
+        """
+        cost = self._cost(pages)
+        with self._cond:
+            self.waiting += 1
+            try:
+                if self._cond.wait_for(
+                    lambda: self.in_flight + cost <= self.max_pages, timeout=self.max_wait
+                ):
+                    self.in_flight += cost
+                    self.admitted += 1
+                    return
+            finally:
+                self.waiting -= 1
+        self._reject(pages)
+
+    async def acquire_async(self, pages: int):
+        """
+        Acquire from the event loop, polling instead of blocking a thread while queued.
+        """
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            self.waiting += 1
+        try:
+            while not self.try_acquire(pages):
+                if time.monotonic() >= deadline:
+                    self._reject(pages)
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            with self._cond:
+                self.waiting -= 1
+
+    async def reservation(self, pages: int) -> Reservation:
+        await self.acquire_async(pages)
+        return Reservation(self, pages)
+
+    @contextmanager
+    def reserve(self, pages: int):
+        self.acquire(pages)
+        try:
+            yield
+        finally:
+            self.release(pages)
+
+    @asynccontextmanager
+    async def reserve_async(self, pages: int):
+        await self.acquire_async(pages)
+        try:
+            yield
+        finally:
+            self.release(pages)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_pages": self.max_pages,
+                "in_flight_pages": self.in_flight,
+                "utilization": round(self.in_flight / self.max_pages, 3),
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
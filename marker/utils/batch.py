@@ -1,3 +1,9 @@
+import inspect
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Sequence
+
 from marker.utils.gpu import GPUManager
 
 
@@ -17,3 +23,194 @@ def get_batch_sizes_worker_counts(gpu_manager: GPUManager, peak_worker_vram: int
         "equation_batch_size": 16,
         "detector_postprocessing_cpu_workers": 2,
     }, workers
+
+
+_UNRESOLVED = object()
+
+
+class _BatchRequest:
+    def __init__(self, key, kwargs: dict, size: int, batch_size: int):
+        self.key = key
+        self.kwargs = kwargs
+        self.size = size
+        self.batch_size = batch_size
+        self.arrival = time.monotonic()
+        self.future = Future()
+
+
+class BatchingPredictor:
+    """
+    Wraps a surya predictor so that calls from concurrent conversions are merged into
+    shared batches.  The `item_args` hold one entry per input item and are concatenated;
+    all other arguments must match for two calls to share a batch.  A batch is run once
+    it reaches the callers' batch size, or `max_wait` seconds after its first request
+    arrived, and the results are split back to each caller.
+    """
+
+    def __init__(
+        self,
+        predictor,
+        item_args: Sequence[str],
+        batch_size_kwarg: str = "batch_size",
+        max_wait: float = 0.02,
+    ):
+        self._predictor = predictor
+        self._signature = _UNRESOLVED
+        self._item_args = frozenset(item_args)
+        self._batch_size_kwarg = batch_size_kwarg
+        self._max_wait = max_wait
+        self._pending: List[_BatchRequest] = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._stats = {"calls": 0, "batches": 0, "items": 0}
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True, name="marker-batcher")
+        self._thread.start()
+
+    def __getattr__(self, name):
+        return getattr(self._predictor, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            # e.g. disable_tqdm, which builders set before each call
+            setattr(self._predictor, name, value)
+
+    def _call_signature(self) -> Optional[inspect.Signature]:
+        # Resolved on the first call, a lazily loaded predictor only exists from then on
+        if self._signature is _UNRESOLVED:
+            predictor = getattr(self._predictor, "__wrapped__", self._predictor)
+            signature = inspect.signature(predictor.__call__)
+            if any(
+                param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+                for param in signature.parameters.values()
+            ):
+                # Calls can't be split into named arguments, so they are never merged
+                signature = None
+            self._signature = signature
+        return self._signature
+
+    def _is_batched(self, name: str, value) -> bool:
+        return name in self._item_args and isinstance(value, list)
+
+    def _default_batch_size(self) -> int:
+        # What the predictor would have used had the caller not been batched
+        get_batch_size = getattr(self._predictor, "get_batch_size", None)
+        return get_batch_size() if get_batch_size is not None else 1
+
+    def __call__(self, *args, **kwargs):
+        signature = self._call_signature()
+        if signature is None:
+            return self._predictor(*args, **kwargs)
+        try:
+            # Positional and keyword calls alike, so arguments can be told apart by name
+            kwargs = dict(signature.bind(*args, **kwargs).arguments)
+        except TypeError:
+            return self._predictor(*args, **kwargs)
+
+        batch_size = kwargs.pop(self._batch_size_kwarg, None)
+        sizes = {len(v) for k, v in kwargs.items() if self._is_batched(k, v)}
+        if len(sizes) == 1 and sizes != {0}:
+            key = tuple(sorted((k, "*" if self._is_batched(k, v) else repr(v)) for k, v in kwargs.items()))
+            request = _BatchRequest(key, kwargs, sizes.pop(), batch_size or self._default_batch_size())
+            with self._cond:
+                # Checked together with the append, so no request is queued after stop() drained the queue
+                if not self._stopped:
+                    self._pending.append(request)
+                    self._stats["calls"] += 1
+                    self._cond.notify()
+                    queued = True
+                else:
+                    queued = False
+            if queued:
+                return request.future.result()
+
+        # Nothing to batch, per-item inputs of different lengths, or the batcher was stopped
+        if batch_size is not None:
+            kwargs[self._batch_size_kwarg] = batch_size
+        return self._predictor(**kwargs)
+
+    def _next_batch(self) -> List[_BatchRequest]:
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return []
+
+            first = self._pending[0]
+            deadline = first.arrival + self._max_wait
+            while True:
+                group = [r for r in self._pending if r.key == first.key]
+                target = max(r.batch_size for r in group)
+                remaining = deadline - time.monotonic()
+                if sum(r.size for r in group) >= target or remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+                if self._stopped:
+                    # stop() failed and dropped everything pending while we waited
+                    return []
+
+            batch, size = [], 0
+            for r in group:
+                if batch and size + r.size > target:
+                    break
+                batch.append(r)
+                size += r.size
+            self._pending = [r for r in self._pending if r not in batch]
+            return batch
+
+    def _dispatch_loop(self):
+        while not self._stopped:
+            batch = self._next_batch()
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_BatchRequest]):
+        first = batch[0]
+        kwargs = {
+            k: [item for r in batch for item in r.kwargs[k]] if self._is_batched(k, v) else v
+            for k, v in first.kwargs.items()
+        }
+        kwargs[self._batch_size_kwarg] = max(r.batch_size for r in batch)
+        total = sum(r.size for r in batch)
+
+        try:
+            result = self._predictor(**kwargs)
+            slices, start = [], 0
+            for r in batch:
+                slices.append(self._slice_result(result, start, start + r.size, total))
+                start += r.size
+        except Exception as e:
+            for r in batch:
+                r.future.set_exception(e)
+            return
+
+        self._stats["batches"] += 1
+        self._stats["items"] += total
+        for r, r_result in zip(batch, slices):
+            r.future.set_result(r_result)
+
+    @staticmethod
+    def _slice_result(result, start: int, end: int, total: int):
+        if isinstance(result, list):
+            return result[start:end]
+        # Result objects holding one list per input, like OCRErrorDetectionResult
+        updates = {
+            name: value[start:end]
+            for name, value in vars(result).items()
+            if isinstance(value, list) and len(value) == total
+        }
+        return result.model_copy(update=updates)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["mean_batch_size"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0
+        return stats
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            pending, self._pending = self._pending, []
+            self._cond.notify_all()
+        for r in pending:
+            r.future.set_exception(RuntimeError("Batching predictor stopped"))
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from marker.logger import get_logger
+
+logger = get_logger()
+
+
+def hash_document(source: str | bytes) -> str:
+    sha = hashlib.sha256()
+    if isinstance(source, bytes):
+        sha.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+def conversion_cache_key(source: str | bytes, config: dict, model_versions: Dict[str, Any]) -> str:
+    """
+    Content-addressed key: the same bytes converted with the same effective config and
+    the same models map to the same entry, whatever URL or filename they came from.
+    """
+    normalized = json.dumps(
+        {"config": config, "models": model_versions}, sort_keys=True, default=str
+    )
+    sha = hashlib.sha256()
+    sha.update(hash_document(source).encode())
+    sha.update(normalized.encode())
+    return sha.hexdigest()
+
+
+class BaseResultCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            data = self._get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(data)
+
+    def set(self, key: str, value: Any):
+        # JSON rather than pickle, so whoever can write to a shared cache folder cannot run code here.
+        # Like the JSON response, int keys come back as strings.
+        data = json.dumps(value, default=str, separators=(",", ":")).encode()
+        if len(data) > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        with self._lock:
+            self._set(key, data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": type(self).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": self._entries(),
+                "size_bytes": self._size(),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _set(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def _entries(self) -> int:
+        raise NotImplementedError
+
+    def _size(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryResultCache(BaseResultCache):
+    """
+    In-process LRU, evicting least recently used results once `max_bytes` is exceeded.
+    Results are stored serialized, so every hit returns a fresh copy.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+        self._total = 0
+
+    def _get(self, key: str) -> Optional[bytes]:
+        data = self._data.get(key)
+        if data is not None:
+            self._data.move_to_end(key)
+        return data
+
+    def _set(self, key: str, data: bytes):
+        if key in self._data:
+            self._total -= len(self._data.pop(key))
+        self._data[key] = data
+        self._total += len(data)
+        while self._total > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self._total -= len(evicted)
+
+    def _entries(self) -> int:
+        return len(self._data)
+
+    def _size(self) -> int:
+        return self._total
+
+
+class DiskResultCache(BaseResultCache):
+    """
+    Results stored as JSON in `cache_dir`, shared by every process pointing at the same folder.
+    Access times are tracked through the file mtime, and the least recently used files
+    are removed once the folder grows past `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int, cache_dir: str):
+        super().__init__(max_bytes)
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _set(self, key: str, data: bytes):
+        # Write to a temporary file first, so readers never see a partial entry
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False, suffix=".tmp") as f:
+            f.write(data)
+        os.replace(f.name, self._path(key))
+        self._evict()
+
+    def _files(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        return files
+
+    def _evict(self):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, name in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+    def _entries(self) -> int:
+        return len(self._files())
+
+    def _size(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+
+def create_result_cache(backend: Optional[str], max_bytes: int, cache_dir: str) -> Optional[BaseResultCache]:
+    if not backend or backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryResultCache(max_bytes)
+    if backend == "disk":
+        return DiskResultCache(max_bytes, cache_dir)
+    raise ValueError(f"Unknown cache backend: {backend}")
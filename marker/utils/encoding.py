@@ -0,0 +1,119 @@
+import base64
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from marker.settings import settings
+
+IMAGE_MEDIA_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+
+
+class ArtifactStore:
+    """
+    Short-lived in-memory store for binary parts of a response, like extracted images,
+    so clients fetch them once from `/artifacts/{id}` instead of receiving them base64
+    encoded inside the JSON body.  Oldest entries are dropped past `max_bytes`.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, Tuple[float, str, bytes]] = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def put(self, data: bytes, media_type: str) -> str:
+        artifact_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            self._data[artifact_id] = (time.monotonic() + self.ttl, media_type, data)
+            self._total += len(data)
+            while self._total > self.max_bytes and len(self._data) > 1:
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._total -= len(evicted)
+        return artifact_id
+
+    def get(self, artifact_id: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            self._prune()
+            entry = self._data.get(artifact_id)
+        if entry is None:
+            return None
+        _, media_type, data = entry
+        return media_type, data
+
+    def _prune(self):
+        now = time.monotonic()
+        while self._data:
+            artifact_id, (expires, _, data) = next(iter(self._data.items()))
+            if expires > now:
+                break
+            del self._data[artifact_id]
+            self._total -= len(data)
+
+
+def decode_images(output: Dict[str, Any]) -> Dict[str, bytes]:
+    """
+    The renderers return images as base64 strings keyed by block path
+    (`/page/0/Picture/3.jpeg`); turn them back into raw bytes.
+    """
+    images = output.get("images") or {}
+    return {
+        name: base64.b64decode(image) if isinstance(image, str) else image
+        for name, image in images.items()
+    }
+
+
+def _str_keys(obj):
+    # Page ids are int keys; JSON turns them into strings and msgpack readers reject them
+    if isinstance(obj, dict):
+        return {str(k) if isinstance(k, int) else k: _str_keys(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_str_keys(v) for v in obj]
+    return obj
+
+
+def encode_msgpack(output: Dict[str, Any]) -> bytes:
+    """
+    MessagePack body with images as binary values instead of base64 strings.
+    """
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("The msgpack response format requires the `msgpack` package.")
+
+    output = {**_str_keys(output), "images": decode_images(output)}
+    return msgpack.packb(output, default=str)
+
+
+def encode_json_zstd(output: Dict[str, Any], artifact_store: ArtifactStore, base_url: str = "/artifacts") -> bytes:
+    """
+    zstd-compressed JSON body, with each image moved to the artifact store and replaced
+    by a reference under its block path.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("The json+zstd response format requires the `zstandard` package.")
+
+    media_type = IMAGE_MEDIA_TYPES.get(settings.OUTPUT_IMAGE_FORMAT, "application/octet-stream")
+    image_refs = {}
+    for name, data in decode_images(output).items():
+        artifact_id = artifact_store.put(data, media_type)
+        image_refs[name] = {
+            "artifact_id": artifact_id,
+            "url": f"{base_url}/{artifact_id}",
+            "media_type": media_type,
+            "size": len(data),
+        }
+
+    output = {**output, "images": image_refs}
+    body = json.dumps(output, default=str, separators=(",", ":")).encode(settings.OUTPUT_ENCODING)
+    return zstandard.ZstdCompressor(level=3).compress(body)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from typing import Optional
+
+from marker.settings import settings
+
+
+class SpooledDocument:
+    """
+    Collects an incoming document in memory and only spills it to a uniquely named
+    temporary file once it grows past `max_memory_bytes`.  `source` is what gets
+    handed to the converter: the bytes themselves, or the temporary file's path.
+    """
+
+    def __init__(self, max_memory_bytes: Optional[int] = None, suffix: str = ".pdf"):
+        self.max_memory_bytes = settings.INMEMORY_MAX_BYTES if max_memory_bytes is None else max_memory_bytes
+        self.suffix = suffix
+        self.size = 0
+        self._buffer = bytearray()
+        self._file = None
+        self.path: Optional[str] = None
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self._file is None and self.size > self.max_memory_bytes:
+            self._file = tempfile.NamedTemporaryFile(delete=False, suffix=self.suffix)
+            self.path = self._file.name
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer += chunk
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    @property
+    def source(self) -> str | bytes:
+        self.close()
+        if self.path is not None:
+            return self.path
+        if not isinstance(self._buffer, bytes):
+            # Freeze once, so the document is not held twice in memory
+            self._buffer = bytes(self._buffer)
+        return self._buffer
+
+    def cleanup(self):
+        self.close()
+        self._buffer = bytearray()
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass  # Ignore cleanup errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
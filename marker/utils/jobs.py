@@ -0,0 +1,134 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from marker.logger import get_logger
+
+logger = get_logger()
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.progress = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def update_progress(self, stage: str, fraction: float):
+        self.stage = stage
+        self.progress = round(min(max(fraction, 0.0), 1.0), 3)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        out = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            out["error"] = self.error
+            # What the conversion failed with, e.g. 429 for admission; the job lookup itself succeeded
+            out["error_status_code"] = self.status_code
+        if include_result and self.status == "completed":
+            out["result"] = self.result
+        return out
+
+
+class JobManager:
+    """
+    Runs conversions on a bounded thread pool.  At most `max_workers` jobs run at once
+    and at most `max_queued` more may wait; anything beyond that is refused with
+    `JobQueueFull` so the HTTP layer can answer 429 instead of piling up work.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 16, result_ttl: float = 3600):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="marker-job")
+        self.jobs: Dict[str, Job] = {}
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Job:
+        """
+        `fn` is called with a `progress_callback(stage, fraction)` keyword argument.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"Job queue is full ({self.max_workers + self.max_queued} jobs pending)")
+
+        self.prune()
+        job = Job(uuid.uuid4().hex)
+        with self._lock:
+            self.jobs[job.job_id] = job
+
+        try:
+            self.executor.submit(self._run, job, fn, *args, **kwargs)
+        except RuntimeError:
+            # Executor already shut down
+            self._slots.release()
+            with self._lock:
+                del self.jobs[job.job_id]
+            raise
+        return job
+
+    def _run(self, job: Job, fn: Callable, *args, **kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, progress_callback=job.update_progress, **kwargs)
+            job.status = "completed"
+            job.update_progress("done", 1.0)
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            traceback.print_exc()
+            job.status = "failed"
+            job.error = str(e)
+            job.status_code = getattr(e, "status_code", 500)
+        finally:
+            job.finished_at = time.time()
+            self._slots.release()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def prune(self):
+        # Drop finished jobs whose results nobody collected in time
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self.jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            **{status: statuses.count(status) for status in ("queued", "running", "completed", "failed")},
+        }
+
+    def shutdown(self, wait: bool = False):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,223 @@
+import hashlib
+import inspect
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import torch
+
+from marker.logger import get_logger
+from marker.settings import settings
+
+logger = get_logger()
+
+BACKENDS = ("torch", "onnx")
+
+# Single-pass encoders; recognition and table recognition decode token by token
+ONNX_MODELS = ("layout_model", "detection_model", "ocr_error_model")
+
+
+def _session_options(threads: Optional[int]):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = threads or torch.get_num_threads()
+    options.inter_op_num_threads = 1
+    return options
+
+
+def _clone(value):
+    return value.clone() if isinstance(value, torch.Tensor) else value
+
+
+class OnnxForward:
+    """
+    Replaces the forward of a predictor's torch module.  On the first call the module
+    is exported to ONNX, using that call's inputs, and cached in `cache_dir`; from then
+    on calls run through onnxruntime and the outputs are rebuilt into what the torch
+    module returns, so the predictor around it works unchanged.
+
+    Non-tensor arguments are baked into the exported graph, so calls that pass
+    different ones, and any model that fails to export, run through torch instead.
+    """
+
+    def __init__(self, name: str, module: torch.nn.Module, cache_dir: str, threads: Optional[int] = None):
+        self.name = name
+        self.module = module
+        self.torch_forward = module.forward
+        self.cache_dir = cache_dir
+        self.threads = threads
+        self.session = None
+        self.failed = False
+        self.calls = 0
+        self.fallbacks = 0
+        self._signature = inspect.signature(self.torch_forward)
+        self._constants: Optional[str] = None
+        self._input_names: List[str] = []
+        self._output_names: List[str] = []
+        self._output_cls = None
+        self._lock = threading.Lock()
+
+    def _split_inputs(self, args, kwargs):
+        bound = self._signature.bind(*args, **kwargs)
+        tensors, constants = {}, {}
+        for arg_name, value in bound.arguments.items():
+            if isinstance(value, torch.Tensor):
+                tensors[arg_name] = value
+            else:
+                constants[arg_name] = value
+        return tensors, repr(sorted(constants.items()))
+
+    def _cache_path(self, constants: str) -> str:
+        model_config = getattr(self.module, "config", None)
+        key = "|".join([
+            self.name,
+            str(getattr(model_config, "_name_or_path", type(self.module).__name__)),
+            torch.__version__,
+            ",".join(self._input_names),
+            constants,
+        ])
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{self.name}-{digest}.onnx")
+
+    def _record_outputs(self, output) -> List[torch.Tensor]:
+        if isinstance(output, torch.Tensor):
+            self._output_names, self._output_cls = ["output"], torch.Tensor
+            return [output]
+        if hasattr(output, "keys") and hasattr(output, "to_tuple"):
+            # transformers ModelOutput; only the fields that are set are exported
+            self._output_names, self._output_cls = list(output.keys()), type(output)
+            values = list(output.to_tuple())
+        elif isinstance(output, (tuple, list)):
+            self._output_names = [f"output_{i}" for i in range(len(output))]
+            self._output_cls = type(output)
+            values = list(output)
+        else:
+            raise TypeError(f"Unsupported output type {type(output).__name__}")
+
+        if not all(isinstance(v, torch.Tensor) for v in values):
+            raise TypeError("Only tensor outputs can be exported")
+        return values
+
+    def _rebuild_outputs(self, arrays, device):
+        tensors = [torch.from_numpy(a).to(device) for a in arrays]
+        if self._output_cls is torch.Tensor:
+            return tensors[0]
+        if self._output_cls in (tuple, list):
+            return self._output_cls(tensors)
+        return self._output_cls(**dict(zip(self._output_names, tensors)))
+
+    def _prepare(self, tensors: Dict[str, torch.Tensor], constants: str, args, kwargs):
+        import onnxruntime as ort
+
+        output = self.torch_forward(*args, **kwargs)
+        expected = self._record_outputs(output)
+        self._input_names = list(tensors)
+        path = self._cache_path(constants)
+
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            # Export through the original forward, not this wrapper
+            self.module.forward = self.torch_forward
+            try:
+                # Predictors run under inference_mode, whose tensors can't be traced
+                with torch.inference_mode(False), torch.no_grad():
+                    export_args = tuple(_clone(a) for a in args)
+                    export_kwargs = {k: _clone(v) for k, v in kwargs.items()}
+                    torch.onnx.export(
+                        self.module,
+                        export_args,
+                        tmp_path,
+                        kwargs=export_kwargs,
+                        input_names=self._input_names,
+                        output_names=self._output_names,
+                        dynamic_axes={
+                            input_name: {dim: f"{input_name}_{dim}" for dim in range(tensor.dim())}
+                            for input_name, tensor in tensors.items()
+                        },
+                        dynamo=False,
+                    )
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            finally:
+                self.module.forward = self
+            os.replace(tmp_path, path)
+            logger.info(f"Exported {self.name} to {path}")
+
+        session = ort.InferenceSession(
+            path, sess_options=_session_options(self.threads), providers=["CPUExecutionProvider"]
+        )
+        feeds = {k: v.detach().cpu().numpy() for k, v in tensors.items()}
+        arrays = session.run(self._output_names, feeds)
+        if [a.shape for a in arrays] != [tuple(t.shape) for t in expected]:
+            raise ValueError("ONNX outputs do not match the torch module")
+
+        self.session = session
+        self._constants = constants
+        return output
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.failed:
+            return self.torch_forward(*args, **kwargs)
+
+        tensors, constants = self._split_inputs(args, kwargs)
+        if self.session is None:
+            with self._lock:
+                if self.session is None and not self.failed:
+                    try:
+                        return self._prepare(tensors, constants, args, kwargs)
+                    except Exception as e:
+                        logger.warning(f"Running {self.name} with torch, ONNX export failed: {e}")
+                        self.failed = True
+                        return self.torch_forward(*args, **kwargs)
+
+        if self.failed or constants != self._constants or list(tensors) != self._input_names:
+            self.fallbacks += 1
+            return self.torch_forward(*args, **kwargs)
+
+        device = next(iter(tensors.values())).device
+        feeds = {k: v.detach().cpu().numpy() for k, v in tensors.items()}
+        arrays = self.session.run(self._output_names, feeds)
+        return self._rebuild_outputs(arrays, device)
+
+    @property
+    def backend(self) -> str:
+        # The export happens on the first call, so a model that hasn't failed it runs in onnx
+        return "torch" if self.failed else "onnx"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "torch" if self.failed or self.session is None else "onnx",
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def apply_onnx_backend(name: str, predictor, device: str, cache_dir: Optional[str] = None) -> bool:
+    """
+    Routes the predictor's module through onnxruntime.  Only CPU models in
+    `ONNX_MODELS` are converted; everything else keeps running in torch.
+    """
+    module = getattr(predictor, "model", None)
+    if name not in ONNX_MODELS or not isinstance(module, torch.nn.Module) or "cpu" not in str(device):
+        return False
+
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        raise ImportError("The onnx inference backend requires the `onnxruntime` and `onnx` packages.")
+
+    module.forward = OnnxForward(
+        name,
+        module,
+        cache_dir or settings.ONNX_CACHE_DIR,
+        threads=settings.ONNX_INTRA_OP_THREADS,
+    )
+    module._marker_onnx = True
+    return True
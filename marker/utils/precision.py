@@ -0,0 +1,73 @@
+import functools
+from typing import Optional
+
+import torch
+
+from marker.logger import get_logger
+
+logger = get_logger()
+
+PRECISIONS = ("float32", "bfloat16", "int8")
+
+# Models whose linear layers tolerate dynamic int8 quantization; recognition and table
+# recognition decode token by token and lose too much accuracy
+QUANTIZABLE_MODELS = ("layout_model", "detection_model", "ocr_error_model")
+
+
+@functools.lru_cache
+def cpu_supports_bf16() -> bool:
+    """
+    bf16 on CPU is only faster than float32 with native support (AMX or AVX512-BF16);
+    elsewhere it is emulated and slower.
+    """
+    for check in ("_is_amx_tile_supported", "_is_avx512_bf16_supported"):
+        fn = getattr(torch.cpu, check, None)
+        if fn is not None and fn():
+            return True
+
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "amx_bf16" in flags or "avx512_bf16" in flags
+
+
+def _autocast_forward(forward, device_type: str):
+    @functools.wraps(forward)
+    def wrapper(*args, **kwargs):
+        with torch.autocast(device_type=device_type, dtype=torch.bfloat16):
+            return forward(*args, **kwargs)
+
+    return wrapper
+
+
+def apply_precision(name: str, predictor, precision: Optional[str], device: str) -> Optional[str]:
+    """
+    Adjusts a freshly loaded predictor for `precision` in place, and returns the
+    precision actually applied.  `int8` quantizes the linear layers of the models in
+    `QUANTIZABLE_MODELS` and leaves the others at float32; `bfloat16` runs the model
+    under CPU autocast when the CPU has native bf16 support.
+    """
+    if precision is not None and precision not in PRECISIONS:
+        raise ValueError(f"Unknown model precision: {precision}, expected one of {PRECISIONS}")
+    if precision in (None, "float32"):
+        return precision
+
+    module = getattr(predictor, "model", None)
+    if not isinstance(module, torch.nn.Module) or "cpu" not in str(device):
+        return None
+
+    if precision == "int8":
+        if name not in QUANTIZABLE_MODELS:
+            return None
+        torch.ao.quantization.quantize_dynamic(
+            module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        return "int8"
+
+    if not cpu_supports_bf16():
+        logger.warning(f"CPU has no native bf16 support, keeping {name} at float32")
+        return None
+    module.forward = _autocast_forward(module.forward, "cpu")
+    return "bfloat16"
@@ -0,0 +1,180 @@
+import glob
+import os
+from typing import Dict, List, Optional
+
+import psutil
+
+from marker.logger import get_logger
+
+logger = get_logger()
+
+PIN_MODES = ("none", "core", "numa")
+
+
+def _parse_cpu_list(text: str) -> List[int]:
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def available_cpus() -> List[int]:
+    # Respects cgroup cpusets and taskset, unlike the raw cpu count
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(psutil.cpu_count(logical=True) or 1))
+
+
+def physical_cores() -> List[List[int]]:
+    """
+    Available logical CPUs grouped by the physical core they belong to, so
+    hyperthread siblings are never counted as separate cores.
+    """
+    cpus = available_cpus()
+    cores, seen = [], set()
+    for cpu in cpus:
+        if cpu in seen:
+            continue
+        siblings = _read(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list")
+        group = [c for c in _parse_cpu_list(siblings) if c in cpus] if siblings else [cpu]
+        group = group or [cpu]
+        seen.update(group)
+        cores.append(group)
+    return cores
+
+
+def numa_nodes() -> List[List[int]]:
+    cpus = set(available_cpus())
+    nodes = []
+    for path in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")):
+        node_cpus = [c for c in _parse_cpu_list(_read(path) or "") if c in cpus]
+        if node_cpus:
+            nodes.append(node_cpus)
+    return nodes or [sorted(cpus)]
+
+
+class ThreadPlan:
+    """
+    How the physical cores of the machine are split between conversion workers, and
+    how many threads each worker gives to torch, pdftext and detector postprocessing.
+    These stages run one after the other inside a worker, so each can use all of the
+    worker's cores without oversubscribing the machine.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        cores: int,
+        torch_threads: int,
+        pdftext_workers: int,
+        detector_postprocessing_workers: int,
+        pin: str = "none",
+        cpu_sets: Optional[List[List[int]]] = None,
+    ):
+        self.workers = workers
+        self.cores = cores
+        self.torch_threads = torch_threads
+        self.pdftext_workers = pdftext_workers
+        self.detector_postprocessing_workers = detector_postprocessing_workers
+        self.pin = pin
+        self.cpu_sets = cpu_sets or []
+
+    def env(self) -> Dict[str, str]:
+        threads = str(self.torch_threads)
+        return {
+            "OMP_NUM_THREADS": threads,
+            "MKL_NUM_THREADS": threads,
+            "OPENBLAS_NUM_THREADS": threads,
+            "DETECTOR_POSTPROCESSING_CPU_WORKERS": str(self.detector_postprocessing_workers),
+        }
+
+    def apply_env(self):
+        # Spawned workers inherit these, and read them when torch and surya load
+        os.environ.update(self.env())
+
+    def describe(self) -> str:
+        used = self.workers * self.torch_threads
+        plan = (
+            f"{self.workers} workers on {self.cores} physical cores: "
+            f"{self.torch_threads} torch threads, {self.pdftext_workers} pdftext workers and "
+            f"{self.detector_postprocessing_workers} detector postprocessing workers per worker"
+        )
+        if used > self.cores:
+            plan += f", oversubscribed {used}/{self.cores}"
+        elif used < self.cores:
+            plan += f", {self.cores - used} cores idle"
+        if self.pin != "none":
+            plan += f", pinned by {self.pin} to " + "; ".join(
+                ",".join(map(str, cpus)) for cpus in self.cpu_sets
+            )
+        return plan
+
+
+def plan_threads(workers: int, pin: str = "none", nested_processes: bool = False) -> ThreadPlan:
+    """
+    Divides the physical cores evenly between `workers`.  pdftext parallelizes with
+    processes, which daemonic pool workers can't start, so it only gets more than one
+    worker when `nested_processes` is allowed.
+    """
+    if pin not in PIN_MODES:
+        raise ValueError(f"Unknown pin mode: {pin}, expected one of {PIN_MODES}")
+
+    cores = physical_cores()
+    workers = max(1, workers)
+    per_worker = max(1, len(cores) // workers)
+
+    cpu_sets = []
+    if pin == "core":
+        for i in range(workers):
+            worker_cores = cores[i * per_worker:(i + 1) * per_worker] or [cores[i % len(cores)]]
+            cpu_sets.append(sorted(cpu for core in worker_cores for cpu in core))
+    elif pin == "numa":
+        nodes = numa_nodes()
+        cpu_sets = [nodes[i % len(nodes)] for i in range(workers)]
+
+    return ThreadPlan(
+        workers=workers,
+        cores=len(cores),
+        torch_threads=per_worker,
+        pdftext_workers=min(per_worker, 4) if nested_processes else 1,
+        detector_postprocessing_workers=per_worker,
+        pin=pin,
+        cpu_sets=cpu_sets,
+    )
+
+
+def claim_worker_slot(slots) -> int:
+    """
+    Picks a slot for the calling process in a shared `multiprocessing.Array` of pids,
+    reusing slots of workers that have exited, so recycled workers take over the CPU
+    set of the worker they replace.
+    """
+    pid = os.getpid()
+    with slots.get_lock():
+        for i, owner in enumerate(slots):
+            if owner == 0 or not psutil.pid_exists(owner):
+                slots[i] = pid
+                return i
+    return pid % len(slots)
+
+
+def pin_worker(plan: ThreadPlan, slots) -> Optional[List[int]]:
+    if not plan.cpu_sets or not hasattr(os, "sched_setaffinity"):
+        return None
+    cpus = plan.cpu_sets[claim_worker_slot(slots) % len(plan.cpu_sets)]
+    os.sched_setaffinity(0, cpus)
+    return cpus
@@ -0,0 +1,151 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+import torch
+from PIL import Image, ImageDraw
+
+from marker.logger import get_logger
+from marker.settings import settings
+
+logger = get_logger()
+
+# Letter-sized pages at the low and high resolution DocumentBuilder renders by default
+LOWRES_PAGE_SIZE = (816, 1056)
+HIGHRES_PAGE_SIZE = (1632, 2112)
+
+# Encoder-style models with fixed input sizes; recognition decodes autoregressively and
+# gains little from compilation
+COMPILABLE_MODELS = ("layout_model", "detection_model", "table_rec_model", "ocr_error_model")
+
+SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog 0123456789"
+
+
+def synthetic_page(size) -> Image.Image:
+    """
+    A white page with a few lines of text, so detection and layout have something to
+    find and run their full postprocessing.
+    """
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    line_height = max(12, size[1] // 40)
+    for i in range(8):
+        draw.text((size[0] // 10, size[1] // 10 + i * line_height), SAMPLE_TEXT, fill="black")
+    return image
+
+
+def _warm_layout(model, lowres: Image.Image, highres: Image.Image):
+    model([lowres, lowres], batch_size=2)
+
+
+def _warm_detection(model, lowres: Image.Image, highres: Image.Image):
+    model(images=[highres], batch_size=1)
+
+
+def _warm_recognition(model, lowres: Image.Image, highres: Image.Image):
+    from surya.common.surya.schema import TaskNames
+
+    width, height = highres.size
+    model(
+        images=[highres],
+        task_names=[TaskNames.ocr_with_boxes],
+        bboxes=[[[0, 0, width, height // 4]]],
+        recognition_batch_size=1,
+        sort_lines=False,
+    )
+
+
+def _warm_table_rec(model, lowres: Image.Image, highres: Image.Image):
+    model([highres.crop((0, 0, highres.size[0], highres.size[1] // 3))], batch_size=1)
+
+
+def _warm_ocr_error(model, lowres: Image.Image, highres: Image.Image):
+    model([SAMPLE_TEXT * 4, SAMPLE_TEXT], batch_size=2)
+
+
+WARMUP_RUNNERS: Dict[str, Callable] = {
+    "layout_model": _warm_layout,
+    "detection_model": _warm_detection,
+    "recognition_model": _warm_recognition,
+    "table_rec_model": _warm_table_rec,
+    "ocr_error_model": _warm_ocr_error,
+}
+
+
+def enable_compile_cache(cache_dir: str):
+    """
+    Points the inductor caches at `cache_dir`, so compiled graphs are reused across
+    restarts instead of being recompiled by every new process.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", cache_dir)
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+    os.environ.setdefault("TORCHINDUCTOR_AUTOGRAD_CACHE", "1")
+
+
+def compile_model(predictor) -> bool:
+    module = getattr(predictor, "model", None)
+    if not isinstance(module, torch.nn.Module) or getattr(module, "_marker_onnx", False):
+        return False
+    if getattr(module, "_marker_compiled", False):
+        return True
+
+    # Compiling the forward in place keeps the module, and everything holding it, intact
+    module.forward = torch.compile(module.forward, dynamic=True)
+    module._marker_compiled = True
+    return True
+
+
+def warmup_models(
+    models: dict,
+    names: Optional[List[str]] = None,
+    compile: bool = False,
+    cache_dir: Optional[str] = None,
+) -> Dict[str, dict]:
+    """
+    Runs each predictor on synthetic pages, so kernel selection, allocator growth and
+    (with `compile`) graph compilation happen before the first real request.  Returns
+    per-model timings: `warmup` is the first, cold call and `first_call` a second call
+    afterwards, which is what the first request will see.
+    """
+    if compile:
+        enable_compile_cache(cache_dir or settings.MODEL_COMPILE_CACHE_DIR)
+
+    lowres = synthetic_page(LOWRES_PAGE_SIZE)
+    highres = synthetic_page(HIGHRES_PAGE_SIZE)
+
+    timings = {}
+    for name in names or list(WARMUP_RUNNERS):
+        model = models.get(name)
+        runner = WARMUP_RUNNERS.get(name)
+        if model is None or runner is None:
+            continue
+
+        compiled = compile and name in COMPILABLE_MODELS and compile_model(model)
+        disable_tqdm = getattr(model, "disable_tqdm", False)
+        model.disable_tqdm = True
+        try:
+            start = time.perf_counter()
+            with torch.inference_mode():
+                runner(model, lowres, highres)
+            warmup_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with torch.inference_mode():
+                runner(model, lowres, highres)
+            first_call_time = time.perf_counter() - start
+        except Exception as e:
+            logger.warning(f"Warmup of {name} failed: {e}")
+            continue
+        finally:
+            model.disable_tqdm = disable_tqdm
+
+        timings[name] = {
+            "warmup": round(warmup_time, 3),
+            "first_call": round(first_call_time, 3),
+            "compiled": compiled,
+        }
+        logger.info(
+            f"Warmed up {name} in {warmup_time:.2f}s, first call now takes {first_call_time:.2f}s"
+        )
+    return timings